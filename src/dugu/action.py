@@ -49,6 +49,7 @@ from dugu.utils import (
     copy_directory_structures,
     move_files_to_replicant_except,
     remove_files_except,
+    split_identical_files,
     _exit,
 )
 from dugu.app_input import (
@@ -99,6 +100,19 @@ class DuGuScanAction(DuGuDuplicatesCore):
                 p('        %s) %s' % (i2, file))
             p()
 
+        if self._dups_result.hard_links > 0:
+            p('Hard-linked files: (they are the same file, so they take no extra space)')
+            p()
+            i1 = 0
+            for inode, files in self._dups_result.hard_linked_files.items():
+                i1 += 1
+                p('%s) Inode: %s :' % (i1, inode))
+                i2 = 0
+                for file in files:
+                    i2 += 1
+                    p('        %s) %s' % (i2, file))
+                p()
+
     def isolate_duplicates(self) -> bool or str:
         """ Isolates all duplicates to the 'isolation path', then return the 'isolation path'. """
 
@@ -211,6 +225,11 @@ class DuGuScanAction(DuGuDuplicatesCore):
             if not os_path.exists(files[0]) or not os_path.isfile(files[0]) or os_path.islink(files[0]):
                 p('Ignoring this set.')
                 continue
+            if self._args.compare:
+                files = self.__identical_to_first(files=files)
+                if len(files) < 2:
+                    p('Ignoring this set, since its files are no longer identical.')
+                    continue
             remove_files_except(keep=0, files=files, verbose=self._args.verbose, re_print=True)
             if i == self._dups_result.sets:
                 pl(60)
@@ -271,6 +290,31 @@ class DuGuScanAction(DuGuDuplicatesCore):
     #            PRIVATE
     # ------------------------------
 
+    def __identical_to_first(self, files=None) -> list:
+        """ Return the first file of the given set followed by the files that are still identical to it,
+            after comparing them byte-by-byte. """
+
+        unreadable = []
+        for identical_files in split_identical_files(files=files, io_mode=self._args.io_mode, unreadable=unreadable):
+            if files[0] in identical_files:
+                ret = [files[0]] + [file for file in files[1:] if file in identical_files]
+                break
+        else:
+            ret = [files[0]]
+
+        if files[0] in unreadable:
+            log(msg='Could not compare the files of this set.!!', verbose=self._args.verbose, re_print=True, lvl=1)
+            return [files[0]]
+
+        for file in files:
+            if file in unreadable:
+                log(msg='Ignoring Unreadable: %s' % file, verbose=self._args.verbose, re_print=True, lvl=1)
+            elif file not in ret:
+                log(msg='"%s": is no longer identical to "%s".' % (file, files[0]), verbose=self._args.verbose,
+                    re_print=True, lvl=1)
+
+        return ret
+
     # ------------------------------
     #             HOOKS
     # ------------------------------
@@ -23,6 +23,11 @@ import argparse
 # Local application imports
 from dugu.constants import (
     DUGU_UNIQUE_FILES_DIR,
+    PREFETCH_FILES,
+    HASH_BLOCK_SIZE,
+    MMAP_MIN_SIZE,
+    SEGMENT_SIZE,
+    SEGMENTED_HASH_MIN_SEGMENTS,
 )
 from dugu.app_output import (
     _print as p,
@@ -60,6 +65,63 @@ def parse_args() -> argparse.Namespace:
                         choices=['md5', 'sha1', 'sha256', 'sha512'],
                         help='The algorithm to be used in scanning files. (default: md5)')
     # --------------------------------------------------------------------------------------------------------------
+    parser.add_argument('-j', '--jobs', type=int, default=0, metavar='N',
+                        help='''How many workers to use for walking, hashing and copying. (default: 0, which means it
+                        depends on the number of the CPUs that DuGu can use, respecting its CPU affinity and the CPU
+                        quota of its cgroup)''')
+    parser.add_argument('--walk-jobs', dest='walk_jobs', type=int, default=0, metavar='N',
+                        help='How many workers to use for finding and checking the files. (default: same as --jobs)')
+    parser.add_argument('--hash-jobs', dest='hash_jobs', type=int, default=0, metavar='N',
+                        help='How many workers to use for hashing and comparing files. (default: same as --jobs)')
+    parser.add_argument('--copy-jobs', dest='copy_jobs', type=int, default=0, metavar='N',
+                        help='How many workers to use for copying the unique files. (default: same as --jobs)')
+    parser.add_argument('--fixed-hash-jobs', dest='adaptive_jobs', action='store_false', default=True,
+                        help='''Keep all the hashing workers busy. Otherwise, how many of them are used is adapted to
+                        the measured throughput (bytes/sec and files/sec), up to --hash-jobs.''')
+    # --------------------------------------------------------------------------------------------------------------
+    parser.add_argument('--executor', type=str, default='auto',
+                        choices=['auto', 'thread', 'process'],
+                        help='''Where the files are hashed: "thread" uses threads, which avoids spawning processes and
+                        pickling the jobs. "process" uses processes, which only pays off when hashing is CPU-bound.
+                        "auto" measures how fast the selected hash type is, then uses processes for the big files if
+                        hashing is CPU-bound, and threads for the rest. (default: auto)''')
+    parser.add_argument('--read-order', dest='read_order', type=str, default='inode',
+                        choices=['walk', 'inode', 'physical'],
+                        help='''The order in which the files of each device are read: "walk" keeps the order they were
+                        found in. "inode" sorts them by their inode numbers, which usually follow where they are stored.
+                        "physical" sorts them by where they actually start on the disk (Linux only, through FIEMAP),
+                        which costs an extra call per file, but saves the most seeking on spinning disks.
+                        (default: inode)''')
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_FILES, metavar='N',
+                        help='''While hashing a file, ask the OS to start reading the next N files in the background,
+                        so the disk never waits for the next read. 0 disables it. (default: %d)''' % PREFETCH_FILES)
+    parser.add_argument('--io-mode', dest='io_mode', type=str, default='cached',
+                        choices=['cached', 'uncached', 'direct'],
+                        help='''How the files are read while hashing and comparing them: "cached" reads them through the
+                        page cache as usual. "uncached" drops what was read from the page cache right behind the
+                        reading, so scanning does not evict what the other applications keep in it. "direct" reads
+                        them around the page cache (O_DIRECT), where it's supported, or falls back to "uncached".
+                        (default: cached)''')
+    parser.add_argument('--block-size', dest='block_size', type=int, default=HASH_BLOCK_SIZE // 1024, metavar='KiB',
+                        help='''How many KiB are read at once from each file while hashing it. (default: %d)'''
+                             % (HASH_BLOCK_SIZE // 1024))
+    parser.add_argument('--mmap', action='store_true', default=False,
+                        help='''Hash the files that are at least %d MiB straight out of their memory maps, instead of
+                        reading them block by block. (unless "--io-mode" is not "cached")'''
+                             % (MMAP_MIN_SIZE // 1024 // 1024))
+    parser.add_argument('--segment-size', dest='segment_size', type=int, default=SEGMENT_SIZE // 1024 // 1024,
+                        metavar='MiB',
+                        help='''The files that are at least %d segments of this size are hashed segment by segment, where
+                        the segments are hashed in parallel, and their digest is the hash of their segments' digests.
+                        0 disables it. Note that changing it changes the hashes of those files, so the cache is
+                        re-generated. (default: %d)''' % (SEGMENTED_HASH_MIN_SEGMENTS, SEGMENT_SIZE // 1024 // 1024))
+    # --------------------------------------------------------------------------------------------------------------
+    parser.add_argument('-c', '--compare', action='store_true', default=False,
+                        help='''Find the duplicates by comparing the same size files byte-by-byte instead of hashing
+                        their whole contents, which stops reading them as soon as they differ. When being used with
+                        "-R" or "--autoremove", each set is compared once again right before removing its duplicates.
+                        ''')
+    # --------------------------------------------------------------------------------------------------------------
     group = parser.add_mutually_exclusive_group()
     # --------------------------------------------------------------------------------------------------------------
     group.add_argument('-p', '--print_duplicates', action='store_true', default=False,
@@ -16,32 +16,53 @@
 
 # Standard library imports
 from __future__ import absolute_import
-from time import (
-    strftime as time_strftime,
-    localtime as time_localtime,
+from array import array
+from contextlib import (
+    closing,
+    nullcontext,
 )
+from mmap import (
+    mmap,
+    ACCESS_READ,
+)
+from os import (
+    fsencode as os_fsencode,
+    fsdecode as os_fsdecode,
+    replace as os_replace,
+)
+from struct import (
+    Struct,
+    error as struct_error,
+)
+from time import time_ns
 import pickle
+import sqlite3
 
 # Third party imports
 
 # Local application imports
 from dugu.app_input import args_namespace
 from dugu.data import (
+    DuGuFileInfo,
     DuGuScannedData,
     DuGuDuplicatesData,
     DuGuUniqueData,
 )
+from dugu.executors import DuGuExecutor
+from dugu.workers import DuGuWorker
 from dugu.utils import (
     os_path,
     path_is,
     hashlib_md5,
+    digest_size,
     mkdir,
     remove_file,
     build_path,
 )
 from dugu.constants import (
-    DATETIME_FORMAT,
     MAX_LINE_COLUMNS,
+    WALK_BATCH_FILES,
+    INDEX_LOCK_TIMEOUT,
     DUGU_CACHE_DIR,
     DUGU_CACHE_PATH,
 )
@@ -65,6 +86,7 @@ class DuGuCache(object):
     _cache_name = ''   # 'scan' | 'dups' | 'uniq'
     _cache_desc = ''   # '' | 'SRC' | 'DST'
     _cache_file = ''   # path of cache file
+    _cache_ext = 'pkl'  # 'pkl' | 'db'
     _cache_data = DuGuScannedData or DuGuDuplicatesData or DuGuUniqueData
 
     # ------------------------------
@@ -133,8 +155,8 @@ class DuGuCache(object):
     @property
     def filename(self) -> str:
         """ Return the cache filename. Something like:
-            dir-path-md5-hash_[md5|sha1|sha256|sha512]_[scan|dups|uniq].pkl.
-            Ex: 79db3b68f33e4877b1b56dec92bc8796_md5_scan.pkl. """
+            dir-path-md5-hash_[md5|sha1|sha256|sha512][-cmp]_[scan|dups|uniq].[pkl|db].
+            Ex: 79db3b68f33e4877b1b56dec92bc8796_md5_scan.db. """
 
         return os_path.basename(self._cache_file)
 
@@ -229,8 +251,12 @@ class DuGuCache(object):
     #           PROTECTED
     # ------------------------------
 
-    def _is_validated(self, against=None) -> bool:
-        """ Return True if the cache file is valid, otherwise return False. """
+    def _is_validated(self, against=None, full_hashes=False, jobs=0) -> bool:
+        """ Return True if the cache file is valid, otherwise return False.
+
+            full_hashes: whether or not every cached file must have its hash. (ex: a cache that was generated by the
+                         'scan' action, does not have the hashes of the files with a unique size)
+            jobs: how many threads stat the cached files, in batches of WALK_BATCH_FILES. """
 
         def __fail(s, cache_desc=''):
             pf('Validating %sCache Data' % cache_desc, status='Fail',
@@ -244,6 +270,11 @@ class DuGuCache(object):
             return True
 
         if self._cache_type is DuGuScannedData:
+            if self._cache_data.segment_size != against.segment_size:
+                pf('Diff Segment Size Detected', status='Done', suffix='\r', suffix_space=True,
+                   max_cols=MAX_LINE_COLUMNS)
+                return __fail(self, cache_desc=self._cache_desc)
+
             if len(self._cache_data) != len(against):
                 if len(self._cache_data) > len(against):
                     pf('Missing Files Detected', status='Done', suffix='\r',
@@ -252,27 +283,51 @@ class DuGuCache(object):
                     pf('New Files Detected', status='Done', suffix='\r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
                 return __fail(self, cache_desc=self._cache_desc)
 
+            if full_hashes and not self._cache_data.is_fully_hashed:
+                pf('Unhashed Files Detected', status='Done', suffix='\r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
+                return __fail(self, cache_desc=self._cache_desc)
+
             i = 0
+            # the paths might go on past the scanned files (ex: the found files of a snapshot, see: _cached_stats())
+            files, sizes, mtimes = self._cached_stats()
+            batches = ((k, (files[k:min(k + WALK_BATCH_FILES, len(sizes))],), 0)
+                       for k in range(0, len(sizes), WALK_BATCH_FILES))
+
+            with DuGuExecutor(mode='thread', max_workers=jobs) if jobs > 1 else nullcontext() as executor:
+                stats = executor.map_unordered(fn=DuGuWorker.stat_files, jobs=batches) if executor \
+                    else ((k, DuGuWorker.stat_files(*args)) for k, args, _ in batches)
+
+                for k, batch in stats:
+                    for j, st in enumerate(batch, k):
+                        if st is None:
+                            pf('Missing Files Detected', status='Done', suffix='\r',
+                               suffix_space=True, max_cols=MAX_LINE_COLUMNS)
+                            return __fail(self, cache_desc=self._cache_desc)
+
+                        if sizes[j] != st[0]:
+                            pf('Diff Sizes Detected', status='Done', suffix='\r', suffix_space=True,
+                               max_cols=MAX_LINE_COLUMNS)
+                            return __fail(self, cache_desc=self._cache_desc)
+
+                        if mtimes[j] != st[1]:
+                            pf('Diff mTime Detected', status='Done', suffix='\r', suffix_space=True,
+                               max_cols=MAX_LINE_COLUMNS)
+                            return __fail(self, cache_desc=self._cache_desc)
+
+                    i += len(batch)
+                    rp('Validating %sCache: (%d/%d) - %d%% \r' % (self._cache_desc, i, len(sizes),
+                                                                  (i * 100 / len(sizes))))
 
-            # arr[0]=size, arr[1]=mtime, arr[2]=hash
-            for file, arr in self._cache_data.metadata.items():
-                i += 1
-                rp('Validating %sCache: (%d/%d) - %d%% \r' % (self._cache_desc, i, len(self._cache_data),
-                                                              (i * 100 / len(self._cache_data))))
-                if not os_path.exists(file) or not os_path.isfile(file):
-                    pf('Missing Files Detected', status='Done', suffix='\r',
-                       suffix_space=True, max_cols=MAX_LINE_COLUMNS)
-                    return __fail(self, cache_desc=self._cache_desc)
+        return __done(cache_desc=self._cache_desc)
 
-                if arr[0] != os_path.getsize(file):
-                    pf('Diff Sizes Detected', status='Done', suffix='\r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
-                    return __fail(self, cache_desc=self._cache_desc)
+    def _cached_stats(self) -> tuple:
+        """ Return the (paths, sizes, mtimes) of the cached scanned files, in the same order, to be validated. Where
+            mtimes are in nanoseconds. """
 
-                if arr[1] != time_strftime(DATETIME_FORMAT, time_localtime(os_path.getmtime(file))):
-                    pf('Diff mTime Detected', status='Done', suffix='\r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
-                    return __fail(self, cache_desc=self._cache_desc)
-
-        return __done(cache_desc=self._cache_desc)
+        metadata = self._cache_data.metadata
+        files = list(metadata)
+        # arr[0]=size, arr[1]=mtime (in nanoseconds), arr[2]=hash
+        return files, [metadata[file][0] for file in files], [metadata[file][1] for file in files]
 
     # ------------------------------
     #           PRIVATE
@@ -306,9 +361,10 @@ class DuGuCache(object):
                            checks='drw', verbose=self._args.verbose)
 
     def __get_cache_path(self) -> str:
-        # (dir-md5-sig)_(md5|sha1|sha256|sha512)_(scan|dups|uniq).pkl
+        # (dir-md5-sig)_(md5|sha1|sha256|sha512)[-cmp]_(scan|dups|uniq).(pkl|db)
         sig = hashlib_md5(str(self._cwd).encode('utf-8')).hexdigest()
-        cache_file = '%s_%s_%s.pkl' % (sig, self._args.hashtype, self._cache_name)
+        hash_type = '%s-cmp' % self._args.hashtype if self._args.compare else self._args.hashtype
+        cache_file = '%s_%s_%s.%s' % (sig, hash_type, self._cache_name, self._cache_ext)
 
         return build_path(cache_file, self.cache_path)
 
@@ -322,6 +378,492 @@ class DuGuCache(object):
 # ----------------------------------------------------------------------
 
 
+class DuGuScanColumns(object):
+    """ The compact columnar snapshot of a scan cache, which is read in place through mmap.
+
+        Each record is spread over fixed-width columns: size, mtime, inode, device, flags and the binary hash,
+        head-hash & tail-hash. While the paths are kept in a separate string table. The scanned files come first,
+        then the found files that were not scanned. So opening it only reads its header, and the rest is read by the
+        OS page by page, as it's used. (ex: validating it only reads the paths, the sizes and the mtimes)
+
+        It's also a sequence of the raw (bytes) paths of its records, in the same order. """
+
+    MAGIC = b'DuGuCol\0'
+    VERSION = 1
+
+    # magic, version, digest size, records, scanned records, found records, segment size, generation
+    HEADER = Struct('=8sIIQQQQQ')
+    HEADER_SIZE = 64
+
+    # The flags of each record
+    FOUND = 1
+    HASH = 2
+    HEAD = 4
+    TAIL = 8
+
+    # ------------------------------
+    #        SPECIAL METHODS
+    # ------------------------------
+
+    def __init__(self, file='') -> None:
+        """ Map the given snapshot file. Raise ValueError (or struct.error) if it's not a valid snapshot, or OSError if
+            it could not be read. """
+
+        with open(file, 'rb') as file_handler:
+            self.__mm = mmap(file_handler.fileno(), 0, access=ACCESS_READ)
+
+        magic, version, self.__digest_size, self.__records, self.__scanned, self.__found, self.__segment_size, \
+            self.__generation = self.HEADER.unpack_from(self.__mm)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError('Unknown snapshot: %s' % file)
+
+        view = memoryview(self.__mm)
+        layout = self.__layout(records=self.__records, digest_size=self.__digest_size)
+        if len(view) < layout['paths']:
+            raise ValueError('Truncated snapshot: %s' % file)
+        self.__sizes = view[layout['sizes']:layout['mtimes']].cast('q')
+        self.__mtimes = view[layout['mtimes']:layout['inodes']].cast('q')
+        self.__inodes = view[layout['inodes']:layout['devices']].cast('Q')
+        self.__devices = view[layout['devices']:layout['offsets']].cast('Q')
+        self.__offsets = view[layout['offsets']:layout['flags']].cast('Q')
+        self.__flags = view[layout['flags']:layout['hashes']]
+        self.__digests = {'full': view[layout['hashes']:layout['heads']], 'head': view[layout['heads']:layout['tails']],
+                          'tail': view[layout['tails']:layout['paths']]}
+        self.__paths = view[layout['paths']:]
+        if len(self.__paths) != self.__offsets[-1]:
+            raise ValueError('Truncated snapshot: %s' % file)
+
+    def __len__(self) -> int:
+        return self.__records
+
+    def __getitem__(self, key):
+        """ Return the raw path of the given record, or a list of the raw paths of the given slice of records. """
+
+        if type(key) is slice:
+            return [self[k] for k in range(*key.indices(self.__records))]
+        return bytes(self.__paths[self.__offsets[key]:self.__offsets[key + 1]])
+
+    # ------------------------------
+    #          PROPERTIES
+    # ------------------------------
+
+    @property
+    def scanned(self) -> int:
+        """ Return how many of the records are of scanned files. (which are the first ones) """
+
+        return self.__scanned
+
+    @property
+    def found(self) -> int:
+        """ Return how many of the records are of found files. """
+
+        return self.__found
+
+    @property
+    def sizes(self) -> memoryview:
+        """ Return the sizes of the scanned files, in the same order as their records. """
+
+        return self.__sizes[:self.__scanned]
+
+    @property
+    def mtimes(self) -> memoryview:
+        """ Return the mtimes (in nanoseconds) of the scanned files, in the same order as their records. """
+
+        return self.__mtimes[:self.__scanned]
+
+    @property
+    def segment_size(self) -> int:
+        return self.__segment_size
+
+    @property
+    def generation(self) -> int:
+        """ Return the generation of the scan cache that the snapshot was written along with. (see: write()) """
+
+        return self.__generation
+
+    # ------------------------------
+    #           PUBLIC
+    # ------------------------------
+
+    def path(self, k=0) -> str:
+        """ Return the path of the given record. """
+
+        return os_fsdecode(self[k])
+
+    def found_files(self) -> list:
+        """ Return the paths of the found files. Ex: [filepath1, filepath2, .., filepathN] """
+
+        return [self.path(k) for k in range(self.__records) if self.__flags[k] & self.FOUND]
+
+    def results(self) -> list:
+        """ Return the DuGuFileInfo of each of the scanned files. """
+
+        ret = []
+        stages = (('full', self.HASH), ('head', self.HEAD), ('tail', self.TAIL))
+        for k in range(self.__scanned):
+            result = DuGuFileInfo()
+            result.set_info(f_name=self.path(k), f_size=self.__sizes[k], f_mtime=self.__mtimes[k],
+                            f_device=self.__devices[k], f_inode=self.__inodes[k])
+            for stage, flag in stages:
+                if self.__flags[k] & flag:
+                    digest = self.__digests[stage][k * self.__digest_size:(k + 1) * self.__digest_size].hex()
+                    result.set_digest(stage=stage, digest=digest)
+            ret.append(result)
+
+        return ret
+
+    @staticmethod
+    def write(file='', rows=None, digest_size=0, segment_size=0, generation=0) -> None:
+        """ Write a snapshot of the given rows into the given file. Where the size is None for the files that were not
+            scanned. The file is replaced at once, so a snapshot that is already mapped is never changed underneath.
+            Raise OSError if it could not be written, or ValueError if any of the digests is not digest_size bytes.
+
+            rows: {filepath: (found, size, mtime, device, inode, hash, head-hash, tail-hash), ..} """
+
+        records = [path for path, row in rows.items() if row[1] is not None]
+        scanned = len(records)
+        records += [path for path, row in rows.items() if row[1] is None]
+
+        paths = [os_fsencode(path) for path in records]
+        offsets = array('Q', [0])
+        for path in paths:
+            offsets.append(offsets[-1] + len(path))
+
+        flags = bytearray(len(records))
+        digests = {'full': bytearray(), 'head': bytearray(), 'tail': bytearray()}
+        empty = bytes(digest_size)
+        for k, path in enumerate(records):
+            found, _, _, _, _, full, head, tail = rows[path]
+            flags[k] = DuGuScanColumns.FOUND if found else 0
+            for stage, flag, digest in (('full', DuGuScanColumns.HASH, full), ('head', DuGuScanColumns.HEAD, head),
+                                        ('tail', DuGuScanColumns.TAIL, tail)):
+                if digest and k < scanned:
+                    digest = bytes.fromhex(digest)
+                    if len(digest) != digest_size:
+                        raise ValueError('Unexpected digest size: %d' % len(digest))
+                    flags[k] |= flag
+                    digests[stage] += digest
+                else:
+                    digests[stage] += empty
+
+        header = DuGuScanColumns.HEADER.pack(DuGuScanColumns.MAGIC, DuGuScanColumns.VERSION, digest_size,
+                                             len(records), scanned, sum(1 for row in rows.values() if row[0]),
+                                             segment_size, generation)
+
+        tmp_file = '%s.tmp' % file
+        with open(tmp_file, 'wb') as file_handler:
+            file_handler.write(header.ljust(DuGuScanColumns.HEADER_SIZE, b'\0'))
+            # (found, size, mtime, device, inode, ..) -> sizes, mtimes, inodes & devices
+            for column, typecode in ((1, 'q'), (2, 'q'), (4, 'Q'), (3, 'Q')):
+                file_handler.write(array(typecode, [rows[path][column] or 0 for path in records[:scanned]]
+                                         + [0] * (len(records) - scanned)).tobytes())
+            file_handler.write(offsets.tobytes())
+            file_handler.write(flags)
+            for stage in ('full', 'head', 'tail'):
+                file_handler.write(digests[stage])
+            file_handler.write(b''.join(paths))
+        os_replace(tmp_file, file)
+
+    # ------------------------------
+    #           PRIVATE
+    # ------------------------------
+
+    @staticmethod
+    def __layout(records=0, digest_size=0) -> dict:
+        """ Return where each column of a snapshot of the given number of records starts. Ex: {column: offset, ..} """
+
+        ret = {}
+        offset = DuGuScanColumns.HEADER_SIZE
+        for column, width in (('sizes', 8 * records), ('mtimes', 8 * records), ('inodes', 8 * records),
+                              ('devices', 8 * records), ('offsets', 8 * (records + 1)), ('flags', records),
+                              ('hashes', digest_size * records), ('heads', digest_size * records),
+                              ('tails', digest_size * records), ('paths', 0)):
+            ret[column] = offset
+            offset += width
+
+        return ret
+
+
+# ----------------------------------------------------------------------
+
+
+class DuGuScanCache(DuGuCache):
+    """ The scan cache, which is an indexed SQLite store instead of a pickled object. Saving it only writes the rows of
+        the files that changed since it was saved, and the duplicates can be queried out of it. (see: duplicates())
+
+        Along with it, a columnar snapshot of the saved files is written. Which is loaded instead of the store as long
+        as it's of the same generation, without reading anything but what is needed. (see: DuGuScanColumns) """
+
+    _cache_ext = 'db'
+
+    # The version of the tables below, which is stored in the meta table. A store of any other version is re-generated.
+    SCHEMA_VERSION = 2
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+        # the found files, where the scanned ones have their size, mtime (in nanoseconds), device & inode. The paths are
+        # kept as the raw bytes of their names (os.fsencode()), which are not always valid UTF-8
+        'CREATE TABLE IF NOT EXISTS files (path BLOB PRIMARY KEY, found INTEGER NOT NULL, size INTEGER, '
+        'mtime INTEGER, device INTEGER, inode INTEGER)',
+        'CREATE INDEX IF NOT EXISTS files_size ON files (size)',
+        # the digests of the scanned files, where stage is one of: 'head', 'tail' or 'full'
+        'CREATE TABLE IF NOT EXISTS hashes (path BLOB NOT NULL, stage TEXT NOT NULL, digest TEXT NOT NULL, '
+        'PRIMARY KEY (path, stage)) WITHOUT ROWID',
+        'CREATE INDEX IF NOT EXISTS hashes_digest ON hashes (stage, digest)',
+    )
+
+    # Each saved file, with its digests. (path, found, size, mtime, device, inode, hash, head-hash, tail-hash)
+    ROWS = ('SELECT files.path, found, size, mtime, device, inode, full.digest, head.digest, tail.digest FROM files '
+            "LEFT JOIN hashes AS full ON full.path = files.path AND full.stage = 'full' "
+            "LEFT JOIN hashes AS head ON head.path = files.path AND head.stage = 'head' "
+            "LEFT JOIN hashes AS tail ON tail.path = files.path AND tail.stage = 'tail'")
+
+    # ------------------------------
+    #        SPECIAL METHODS
+    # ------------------------------
+
+    def __init__(self, **kwargs):
+        super(DuGuScanCache, self).__init__(**kwargs)
+
+        # (dir-md5-sig)_(md5|sha1|sha256|sha512)[-cmp]_scan.dgc
+        self._columns_file = '%s.dgc' % os_path.splitext(self._cache_file)[0]
+
+        # the loaded snapshot, if the cache was loaded out of it
+        self.__columns = None
+
+    # ------------------------------
+    #           PUBLIC
+    # ------------------------------
+
+    def save(self, data=None) -> bool:
+        """ Return True if the given valid data is saved successfully, otherwise return False.
+            Only the rows of the files that were added, removed or changed since the last save are written. """
+
+        if not data or not self.is_available or type(data) != self._cache_type:
+            return False
+
+        try:
+            with closing(self.__connect()) as db, db:
+                # {filepath: (found, size, mtime, device, inode, hash, head-hash, tail-hash), ..}
+                saved = {os_fsdecode(row[0]): row[1:] for row in db.execute(self.ROWS)}
+
+                rows = self.__rows(data=data)
+                removed = [(os_fsencode(file),) for file in saved if file not in rows]
+                changed = [(os_fsencode(file),) + row for file, row in rows.items() if saved.get(file) != row]
+
+                db.executemany('DELETE FROM files WHERE path = ?', removed)
+                db.executemany('DELETE FROM hashes WHERE path = ?', removed + [row[:1] for row in changed])
+                db.executemany('INSERT INTO files (path, found, size, mtime, device, inode) VALUES (?, ?, ?, ?, ?, ?) '
+                               'ON CONFLICT (path) DO UPDATE SET found = excluded.found, size = excluded.size, '
+                               'mtime = excluded.mtime, device = excluded.device, inode = excluded.inode',
+                               [row[:6] for row in changed])
+                db.executemany('INSERT INTO hashes (path, stage, digest) VALUES (?, ?, ?)',
+                               [(row[0], stage, digest) for row in changed
+                                for stage, digest in zip(('full', 'head', 'tail'), row[6:]) if digest])
+                # the snapshot is only loaded along with the store it was written with
+                generation = time_ns()
+                db.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                               [('segment_size', data.segment_size), ('generation', generation)])
+        except sqlite3.Error as _:
+            log(msg="Couldn't save the cache! Turning caching feature off.", verbose=self._args.verbose, lvl=1)
+            # so what was saved before it failed, is not mistaken for a valid cache next time
+            self.__drop()
+            self._cache_available = False
+            return False
+
+        self.__save_snapshot(rows=rows, segment_size=data.segment_size, generation=generation)
+
+        return True
+
+    def remove(self) -> bool:
+        """ The store is kept, since it's updated in place rather than re-written. (see: save())
+            Unless it could not be used. (see: load()) """
+
+        return False
+
+    def load(self, **kwargs) -> bool:
+        """ Return True if the valid existed cache file is loaded, otherwise return False. Even when it's not valid,
+            what it holds is still loaded. (see: content) """
+
+        if not self.is_available or not self.exists():
+            return False
+
+        loading_msg = 'Loading %sCache' % self._cache_desc
+        self.__columns = None
+        try:
+            with closing(self.__connect()) as db:
+                meta = dict(db.execute('SELECT key, value FROM meta'))
+                if meta.get('version') != self.SCHEMA_VERSION:
+                    pf('Validating %sCache Type' % self._cache_desc, status='Fail', suffix='\r',
+                       max_cols=MAX_LINE_COLUMNS)
+                    self.__drop()
+                    return False
+
+                self.__columns = self.__snapshot(meta=meta)
+                if self.__columns:
+                    # nothing but its header is read, till the found files or their results are needed
+                    self._cache_data = DuGuScannedData(cwd=self._cwd, segment_size=self.__columns.segment_size)
+                    self._cache_data.restore(files=self.__columns.found_files, results=self.__columns.results,
+                                             total_files=self.__columns.found)
+                else:
+                    files, results = [], []
+                    for path, found, size, mtime, device, inode, full, head, tail in db.execute(self.ROWS):
+                        file = os_fsdecode(path)
+                        if found:
+                            files.append(file)
+                        if size is not None:
+                            result = DuGuFileInfo()
+                            result.set_info(f_name=file, f_size=size, f_mtime=mtime, f_device=device,
+                                            f_inode=inode)
+                            for stage, digest in zip(('full', 'head', 'tail'), (full, head, tail)):
+                                result.set_digest(stage=stage, digest=digest or '')
+                            results.append(result)
+
+                    self._cache_data = DuGuScannedData(cwd=self._cwd, segment_size=meta.get('segment_size', 0))
+                    self._cache_data.restore(files=files, results=results)
+        except sqlite3.Error as _:
+            log(msg="Failed loading: '%s'." % self._cache_file, verbose=self._args.verbose, lvl=1)
+            pf(msg=loading_msg, status='Fail', suffix='\r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
+            self.__drop()
+            return False
+
+        pf(msg=loading_msg, status='Done', suffix=' \r', max_cols=MAX_LINE_COLUMNS)
+        pf('Validating %sCache Type' % self._cache_desc, status='Done', suffix='\r', max_cols=MAX_LINE_COLUMNS)
+
+        # against
+        if not self._is_validated(**locals()['kwargs']):
+            return False
+
+        # the store was saved without its snapshot (ex: by an older version), which is written for the next time
+        if not self.__columns:
+            try:
+                with closing(self.__connect()) as db, db:
+                    generation = time_ns()
+                    db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', ('generation', generation))
+            except sqlite3.Error as _:
+                return True
+            self.__save_snapshot(rows=self.__rows(data=self._cache_data), segment_size=self._cache_data.segment_size,
+                                 generation=generation)
+
+        return True
+
+    def duplicates(self, dups=None) -> bool:
+        """ Register the duplicates (and the hard links) of the saved files in the given DuGuDuplicatesData, straight
+            out of the store: the files that share their full hash, one (device, inode) at a time. Return True if
+            the store could be queried. """
+
+        if not self.is_available or not self.exists():
+            return False
+
+        try:
+            with closing(self.__connect()) as db:
+                rows = db.execute(
+                    'SELECT hashes.digest, files.device, files.inode, files.path FROM hashes '
+                    'JOIN files ON files.path = hashes.path '
+                    "WHERE hashes.stage = 'full' AND hashes.digest IN (SELECT digest FROM hashes WHERE stage = 'full' "
+                    'GROUP BY digest HAVING COUNT(*) > 1) '
+                    'ORDER BY hashes.digest, files.device, files.inode, files.path')
+
+                # the paths of the current file, (digest, device, inode) or (digest, path) if its inode is unknown
+                paths = []
+                key = None
+                for digest, device, inode, file in rows:
+                    if paths and key != ((digest, device, inode) if inode else (digest, file)):
+                        self.__register(dups=dups, paths=paths)
+                        paths = []
+                    key = (digest, device, inode) if inode else (digest, file)
+                    paths.append((digest, device, inode, os_fsdecode(file)))
+                if paths:
+                    self.__register(dups=dups, paths=paths)
+        except sqlite3.Error as _:
+            return False
+
+        return True
+
+    # ------------------------------
+    #           PROTECTED
+    # ------------------------------
+
+    def _cached_stats(self) -> tuple:
+        """ Return the (paths, sizes, mtimes) of the cached scanned files. Straight out of the snapshot's columns,
+            if it was loaded out of it. In which case the paths go on with the found files that were not scanned. """
+
+        if self.__columns:
+            return self.__columns, self.__columns.sizes, self.__columns.mtimes
+        return super(DuGuScanCache, self)._cached_stats()
+
+    # ------------------------------
+    #           PRIVATE
+    # ------------------------------
+
+    def __connect(self) -> sqlite3.Connection:
+        """ Return a new connection to the store, after making sure it has all the tables. """
+
+        db = sqlite3.connect(self._cache_file)
+        with db:
+            for statement in self.SCHEMA:
+                db.execute(statement)
+            db.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', ('version', self.SCHEMA_VERSION))
+
+        return db
+
+    def __drop(self) -> None:
+        """ Remove the store and its snapshot, since they could not be used. """
+
+        super(DuGuScanCache, self).remove()
+        if os_path.isfile(self._columns_file):
+            remove_file(self._columns_file)
+
+    def __save_snapshot(self, rows=None, segment_size=0, generation=0) -> None:
+        """ Write the snapshot of the given rows, which are of the given generation of the store. (see: __rows()) """
+
+        try:
+            DuGuScanColumns.write(file=self._columns_file, rows=rows, digest_size=digest_size(self._args.hashtype),
+                                  segment_size=segment_size, generation=generation)
+        except (OSError, ValueError) as _:
+            log(msg="Couldn't save the cache snapshot: '%s'." % self._columns_file, verbose=self._args.verbose, lvl=1)
+
+    def __snapshot(self, meta=None) -> DuGuScanColumns or None:
+        """ Return the snapshot of the store, if it was written along with its given meta. Otherwise, None. """
+
+        if not os_path.isfile(self._columns_file):
+            return None
+
+        try:
+            columns = DuGuScanColumns(file=self._columns_file)
+        except (OSError, ValueError, struct_error) as _:
+            log(msg="Failed loading: '%s'." % self._columns_file, verbose=self._args.verbose, lvl=1)
+            return None
+
+        if columns.generation != meta.get('generation') or columns.segment_size != meta.get('segment_size', 0):
+            return None
+        return columns
+
+    @staticmethod
+    def __rows(data=None) -> dict:
+        """ Return the row of each of the found and the scanned files of the given DuGuScannedData, as they are saved.
+            Ex: {filepath: (found, size, mtime, device, inode, hash, head-hash, tail-hash), ..} """
+
+        # [size, mtime, hash, head-hash, tail-hash, inode, device]
+        ret = {file: (0, arr[0], arr[1], arr[6], arr[5], arr[2] or None, arr[3] or None, arr[4] or None)
+               for file, arr in data.metadata.items()}
+        for file in data.files:
+            ret[file] = (1,) + ret.get(file, (0, None, None, None, None, None, None, None))[1:]
+
+        return ret
+
+    @staticmethod
+    def __register(dups=None, paths=None) -> None:
+        """ Register the given [(digest, device, inode, path), ..] paths of the same file in the given
+            DuGuDuplicatesData. Only its first path can be a duplicate, while all of them are hard links. """
+
+        digest, device, inode, file = paths[0]
+        dups.check(result=DuGuFileInfo(file=file, _hash=digest))
+        dups.check_hard_links(device=device, inode=inode, files=[path[3] for path in paths])
+
+
+# ----------------------------------------------------------------------
+
+
 class DuGuDuplicatesCache(DuGuCache):
 
     # ------------------------------
@@ -391,6 +933,154 @@ class DuGuUniqueCache(DuGuCache):
 # ----------------------------------------------------------------------
 
 
+class DuGuHashIndex(object):
+    """ The machine-wide index of the hashed files, which is shared by all the scanned directories. Each file is keyed
+        by its absolute path, along with its (size, mtime, inode) fingerprint. So a directory's scan reuses the hashes
+        that are already known for its files, even if they were hashed while scanning one of its parents, one of its
+        sub-directories or an overlapping directory. (see: metadata()) """
+
+    _index_file = ''  # path of the index file, one per hash type and mode. Ex: index_md5.db or index_md5-cmp.db
+
+    # The version of the table below, which is stored in the meta table. An index of any other version is re-generated.
+    SCHEMA_VERSION = 2
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+        # the hashed files, where the full hash was calculated with segment_size (see: DuGuScannedData.segment_size).
+        # The paths are kept as the raw bytes of their names (os.fsencode()), which are not always valid UTF-8
+        'CREATE TABLE IF NOT EXISTS files (path BLOB PRIMARY KEY, size INTEGER NOT NULL, mtime INTEGER NOT NULL, '
+        'inode INTEGER NOT NULL, device INTEGER NOT NULL, segment_size INTEGER NOT NULL, hash TEXT, head TEXT, '
+        'tail TEXT) WITHOUT ROWID',
+    )
+
+    # The indexed files under a directory. (path, size, mtime, inode, device, segment_size, hash, head-hash, tail-hash)
+    ROWS = 'SELECT * FROM files WHERE path >= ? AND path < ?'
+
+    # ------------------------------
+    #        SPECIAL METHODS
+    # ------------------------------
+
+    def __init__(self, args: args_namespace()) -> None:
+        self._args = args
+        # the 'compare' mode only fully hashes the small files, so its index is kept apart. Otherwise, it would forget
+        # the full hashes of the big files, and its files with a known full hash would not be compared
+        hash_type = '%s-cmp' % self._args.hashtype if self._args.compare else self._args.hashtype
+        self._index_file = build_path('index_%s.db' % hash_type, DUGU_CACHE_PATH)
+        self._index_available = mkdir(DUGU_CACHE_PATH, verbose=self._args.verbose, check=True)
+
+    # ------------------------------
+    #          PROPERTIES
+    # ------------------------------
+
+    @property
+    def file(self) -> str:
+        """ Return the index file including its path. """
+
+        return self._index_file
+
+    @property
+    def is_available(self) -> bool:
+        """ Return True if the index is available, otherwise False. """
+
+        return self._index_available
+
+    # ------------------------------
+    #           PUBLIC
+    # ------------------------------
+
+    def metadata(self, path='', segment_size=0) -> dict:
+        """ Return the indexed files under the given directory, in the same format as DuGuScannedData.metadata. Where
+            the hash is an empty string, if it was calculated with another segment size than the given one.
+
+            Ex: {filepath: [size, mtime, hash, head-hash, tail-hash, inode, device], ..} """
+
+        if not self.is_available or not path_is(paths=self._index_file, checks='Ef', verbose=self._args.verbose):
+            return {}
+
+        try:
+            with closing(self.__connect()) as db:
+                return {os_fsdecode(file): [size, mtime, _hash if _segment_size == segment_size else '', head or '',
+                                            tail or '', inode, device]
+                        for file, size, mtime, inode, device, _segment_size, _hash, head, tail
+                        in db.execute(self.ROWS, self.__subtree(path=path))}
+        except sqlite3.Error as e:
+            self.__fail(msg="Failed loading: '%s'." % self._index_file, error=e)
+            return {}
+
+    def save(self, data=None, path='') -> bool:
+        """ Index the hashed files of the given DuGuScannedData of the given directory, and forget the files under it
+            that are no longer found or have changed. Only the rows that changed since they were indexed are written.
+            Return True if the index is updated successfully, otherwise return False. """
+
+        if type(data) is not DuGuScannedData or not self.is_available:
+            return False
+
+        # {filepath: (size, mtime, inode, device, segment_size, hash, head-hash, tail-hash), ..}
+        rows = {file: (arr[0], arr[1], arr[5], arr[6], data.segment_size, arr[2] or None, arr[3] or None,
+                       arr[4] or None) for file, arr in data.metadata.items() if len(arr) > 6}
+
+        try:
+            with closing(self.__connect()) as db, db:
+                saved = {os_fsdecode(row[0]): row[1:] for row in db.execute(self.ROWS, self.__subtree(path=path))}
+
+                # the files that are no longer found, or that have no hash since they changed (ex: now a unique size)
+                removed = [(os_fsencode(file),) for file, row in saved.items()
+                           if file not in rows or not any(rows[file][5:]) and rows[file][:3] != row[:3]]
+                changed = [(os_fsencode(file),) + row for file, row in rows.items()
+                           if any(row[5:]) and saved.get(file) != row]
+
+                db.executemany('DELETE FROM files WHERE path = ?', removed)
+                db.executemany('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', changed)
+        except sqlite3.Error as e:
+            self.__fail(msg="Couldn't update the index: '%s'." % self._index_file, error=e)
+            return False
+
+        return True
+
+    # ------------------------------
+    #           PRIVATE
+    # ------------------------------
+
+    def __connect(self) -> sqlite3.Connection:
+        """ Return a new connection to the index, after making sure it has the tables of its current version. """
+
+        db = sqlite3.connect(self._index_file, timeout=INDEX_LOCK_TIMEOUT)
+        with db:
+            for statement in self.SCHEMA:
+                db.execute(statement)
+            db.execute('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)', ('version', self.SCHEMA_VERSION))
+            version = db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+        if version != self.SCHEMA_VERSION:
+            db.close()
+            raise sqlite3.DatabaseError('Unknown index version: %s' % version)
+
+        return db
+
+    def __fail(self, msg='', error=sqlite3.Error()) -> None:
+        """ Log the given message, and remove the index if the given error means it's corrupted (or of another
+            version). So it's re-generated next time. Otherwise (ex: it's locked by another DuGu run, or the disk
+            failed) it's kept as it is, and only skipped for this run. """
+
+        log(msg=msg, verbose=self._args.verbose, lvl=1)
+        if isinstance(error, sqlite3.OperationalError) or not isinstance(error, sqlite3.DatabaseError):
+            log(msg="Skipping the index for this run.", verbose=self._args.verbose, lvl=1)
+            self._index_available = False
+        elif not remove_file(self._index_file):
+            log(msg="Turning the index off.", verbose=self._args.verbose, lvl=1)
+            self._index_available = False
+
+    @staticmethod
+    def __subtree(path='') -> tuple:
+        """ Return the (lowest, highest) boundaries of the raw paths under the given directory, as they are sorted.
+            Since '0' comes right after '/'. """
+
+        path = os_fsencode(os_path.abspath(path).rstrip('/'))
+        return path + b'/', path + b'0'
+
+
+# ----------------------------------------------------------------------
+
+
 if __name__ == '__main__':
     p('This file is part of DuGu package.')
     exit('And is not meant to run directly.')
@@ -34,7 +34,72 @@ from dugu.version import (
 
 DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 MAX_LINE_COLUMNS = 35
-MAX_USED_CPU_CORES = 6
+
+# The default number of workers per usable CPU, unless they're given with (-j, --jobs) or (--[walk|hash|copy]-jobs).
+# Walking and copying are bound to the disks rather than to the CPUs, so they can use more workers than CPUs.
+WALK_JOBS_PER_CPU = 4
+HASH_JOBS_PER_CPU = 1
+COPY_JOBS_PER_CPU = 2
+
+# How many bytes of the file's head and tail are hashed, before deciding whether to hash its whole contents
+PARTIAL_HASH_SIZE = 4096
+
+# How many bytes are read at once from each file, when comparing files byte-by-byte
+COMPARE_BLOCK_SIZE = 64 * 1024
+# How many files each worker keeps open at once, when comparing files byte-by-byte. The files of a bigger group are
+# re-opened (at the position they were at) whenever they're read again
+COMPARE_MAX_OPEN_FILES = 32
+
+# How many bytes are read at once from each file while hashing it, into the same reused buffer. And the files that are
+# at least MMAP_MIN_SIZE bytes can be hashed straight out of their memory maps instead. (see: --mmap)
+HASH_BLOCK_SIZE = 1024 * 1024
+MMAP_MIN_SIZE = 64 * 1024 * 1024
+
+# The files that are at least SEGMENTED_HASH_MIN_SEGMENTS segments of SEGMENT_SIZE bytes, are hashed segment by segment
+# (where the segments can be hashed in parallel), and their digest is the hash of their segments' digests. (see:
+# --segment-size) So a single huge file does not keep a single worker busy, while the others are idle.
+SEGMENT_SIZE = 256 * 1024 * 1024
+SEGMENTED_HASH_MIN_SEGMENTS = 4
+
+# When the files are read without being kept in the page cache (see: --io-mode), what was read is dropped from the
+# page cache every DROP_BEHIND_SIZE bytes. And when they are read around it (O_DIRECT), they are read from positions
+# that are aligned to DIRECT_IO_ALIGNMENT bytes.
+DROP_BEHIND_SIZE = 8 * 1024 * 1024
+DIRECT_IO_ALIGNMENT = 4096
+
+# In the 'auto' executor mode, the jobs of the files that are at least this big run in processes instead of threads,
+# as long as a single core hashes slower than EXECUTOR_CPU_BOUND_SPEED (bytes/second). Since otherwise the hashing is
+# bound to the disks, and hashlib releases the GIL anyway.
+EXECUTOR_PROCESS_MIN_SIZE = 16 * 1024 * 1024
+EXECUTOR_CPU_BOUND_SPEED = 1024 * 1024 * 1024
+
+# The files are sent to the workers in batches. Each batch holds as many files as it takes to read BATCH_MAX_BYTES
+# (so the tiny files are grouped into large batches, and the big ones are sent alone), up to BATCH_MAX_FILES files.
+BATCH_MAX_BYTES = 64 * 1024 * 1024
+BATCH_MAX_FILES = 1024
+
+# While hashing a batch of files, the kernel is asked to start reading the next PREFETCH_FILES of them in the background
+# (posix_fadvise's WILLNEED), so the disk always has the upcoming reads queued. Up to PREFETCH_MAX_BYTES of each file.
+PREFETCH_FILES = 8
+PREFETCH_MAX_BYTES = 32 * 1024 * 1024
+
+# How many found files are checked by each job of the walking workers
+WALK_BATCH_FILES = 128
+
+# How many jobs per worker can be submitted to the pool without being done yet. The rest wait for their turn, so the
+# memory of the parent stays flat no matter how many files there are.
+MAX_PENDING_JOBS_PER_WORKER = 4
+
+# While hashing, the number of the jobs that run at once is adapted to the measured throughput (AIMD). Every
+# CONCURRENCY_INTERVAL seconds, it's increased by one as long as the throughput did not drop by more than
+# CONCURRENCY_TOLERANCE, otherwise it's multiplied by CONCURRENCY_DECREASE.
+CONCURRENCY_INTERVAL = 1.0
+CONCURRENCY_TOLERANCE = 0.1
+CONCURRENCY_DECREASE = 0.5
+
+# How many seconds to wait for the machine-wide index, while another DuGu run is writing to it. After which, the index
+# is skipped for this run.
+INDEX_LOCK_TIMEOUT = 30.0
 
 DEFAULT_TMP_PATH = os_path.abspath(gettempdir())
 DUGU_DIR_NAME = 'dugu_%s' % getuser()
@@ -16,7 +16,14 @@
 
 # Standard library imports
 from __future__ import absolute_import
-import concurrent.futures
+from contextlib import nullcontext
+from math import ceil
+from concurrent.futures import (
+    Future,
+    FIRST_COMPLETED,
+    as_completed as futures_as_completed,
+    wait as futures_wait,
+)
 from os import (
     path as os_path,
 )
@@ -30,7 +37,14 @@ from shutil import (
 # Local application imports
 from dugu.constants import (
     MAX_LINE_COLUMNS,
-    MAX_USED_CPU_CORES,
+    WALK_JOBS_PER_CPU,
+    HASH_JOBS_PER_CPU,
+    COPY_JOBS_PER_CPU,
+    WALK_BATCH_FILES,
+    PARTIAL_HASH_SIZE,
+    BATCH_MAX_BYTES,
+    BATCH_MAX_FILES,
+    MAX_PENDING_JOBS_PER_WORKER,
     DUGU_UNIQUE_FILES_DIR,
 )
 from dugu.data import (
@@ -40,19 +54,27 @@ from dugu.data import (
     DuGuUniqueData,
 )
 from dugu.workers import DuGuWorker
+from dugu.executors import (
+    DuGuExecutor,
+    DuGuConcurrency,
+)
 from dugu.cache import (
-    DuGuCache,
+    DuGuScanCache,
     DuGuDuplicatesCache,
+    DuGuHashIndex,
     DuGuUniqueCache,
 )
 from dugu.utils import (
     has_multiple_cores,
+    available_cpus,
     get_dir_size,
     path_is,
     bytes_to_readable_units,
     copy_directory_structures,
     copy_file_to_replicant,
     remove_empty_dirs,
+    segment_offsets,
+    hash_digests,
     _exit,
 )
 from dugu.app_input import (
@@ -120,6 +142,20 @@ class DuGuBaseCore:
     #           PROTECTED
     # ------------------------------
 
+    def _jobs(self, kind='' or 'walk' or 'hash' or 'copy') -> int:
+        """ Return how many workers to use for the given kind of jobs. Which is either what the user asked for through
+            (--walk-jobs, --hash-jobs or --copy-jobs) or (-j, --jobs), or the default for the CPUs DuGu can use. """
+
+        jobs = getattr(self._args, '%s_jobs' % kind, 0) or self._args.jobs
+        if jobs > 0:
+            return jobs
+
+        if kind == 'walk':
+            return available_cpus() * WALK_JOBS_PER_CPU
+        elif kind == 'copy':
+            return available_cpus() * COPY_JOBS_PER_CPU
+        return available_cpus() * HASH_JOBS_PER_CPU
+
     # ----------( HOOKS )-----------
 
     def _hk_extra_checks(self) -> bool:
@@ -132,6 +168,10 @@ class DuGuBaseCore:
 class DuGuScanCore(DuGuBaseCore):
     """ The main scan core object """
 
+    # Whether or not to hash the files that have a unique size. Which can not be duplicates of each other,
+    # but still needed when their hashes are compared against the files of another directory. (ex: precopy)
+    _hash_unique_sizes = True
+
     # ------------------------------
     #        SPECIAL METHODS
     # ------------------------------
@@ -147,7 +187,8 @@ class DuGuScanCore(DuGuBaseCore):
 
         super(DuGuScanCore, self).__init__(args=args, cwd=cwd)
 
-        self._scan_cache = DuGuCache(args=args, cwd=cwd, _type='scan', cache_desc=desc)
+        self._scan_cache = DuGuScanCache(args=args, cwd=cwd, _type='scan', cache_desc=desc)
+        self._hash_index = DuGuHashIndex(args=args)
 
         if scan_type and scan_type.upper() in ('SRC', 'DST'):
             self.__scan_type = '%s ' % scan_type.upper()
@@ -156,8 +197,20 @@ class DuGuScanCore(DuGuBaseCore):
 
         self._report_dir = ''
 
+        # the paths that were not hashed, since they are hard links to other found files. (see: __skip_hard_links())
+        self.__hard_links = {}
+
+        # {filepath: [size, mtime, hash, head-hash, tail-hash, inode, device], ..} of the previous scan and of the
+        # machine-wide index, when the cache is no longer valid. So the digests of the files that did not change are
+        # reused. (see: __reuse_digests())
+        self.__cached = {}
+
+        # how many bytes each segment of the big files has. (see: __segments())
+        self.__segment_size = DuGuWorker.settings(args=self._args)['segment_size']
+
         self._scan_result = DuGuScannedData(cwd=self._cwd, which=self.__scan_type.strip(), show_progress=True,
-                                            follow_symlinks=self._args.follow_symlinks)
+                                            follow_symlinks=self._args.follow_symlinks, walk_jobs=self._jobs('walk'),
+                                            segment_size=self.__segment_size)
 
     # ------------------------------
     #           PROPERTIES
@@ -180,11 +233,15 @@ class DuGuScanCore(DuGuBaseCore):
         if self._args.force:
             self._init_scan()
         else:
-            if self._scan_cache.load(against=self._scan_result):
+            if self._scan_cache.load(against=self._scan_result, full_hashes=self._hash_unique_sizes,
+                                     jobs=self._jobs('walk')):
                 self._scan_result = self._scan_cache.content
                 self._hk_if__cache_is_loaded()
             else:
+                self.__cached = self.__reusable_metadata(data=self._scan_cache.content)
+                self.__cached.update(self._hash_index.metadata(path=self._cwd, segment_size=self.__segment_size))
                 self._init_scan()
+                self.__cached = {}
 
         self._first_run = False
         return
@@ -204,18 +261,39 @@ class DuGuScanCore(DuGuBaseCore):
         self._scan_cache.remove()
         self._hk_before__init_scan()
 
-        i = 0
-        if self._has_multiple_cores:
-            with concurrent.futures.ProcessPoolExecutor(max_workers=MAX_USED_CPU_CORES) as executor:
-                workers = [executor.submit(DuGuWorker.scrub_file, f, self._args)
-                           for f in self._scan_result.files]
-                for worker in concurrent.futures.as_completed(workers):
-                    i = self.__progress(i)
-                    self.__process_result(worker.result())
+        # next phases: hashing the files that still share their digests with other files, stage after stage
+        if self._hash_unique_sizes:
+            stages = ('full',)
+        elif self._args.compare:
+            stages = ('head', 'tail', 'compare')
         else:
-            for file in iter(self._scan_result.files):
-                i = self.__progress(i)
-                self.__process_result(DuGuWorker.scrub_file(file, self._args))
+            stages = ('head', 'tail', 'full')
+
+        settings = DuGuWorker.settings(args=self._args)
+        DuGuWorker.init_settings(settings=settings)
+
+        # 1st phase: stat-only, to know which files are worth hashing. Which starts as soon as the first files are
+        # found, and so does the first stage. And only one path of each file (inode) is hashed, the others
+        # (hard links) are registered with its digests.
+        infos = self.__skip_hard_links(infos=self.__inspect_files(stage=stages[0], settings=settings))
+        groups = [infos] if self._hash_unique_sizes else self.__regroup(groups=[infos], stage='size')
+
+        # the hashing workers are shared by all the devices, where each one gets its own share of them (see:
+        # __run_jobs()) so all the devices are read side by side
+        max_workers = self._jobs('hash')
+
+        with DuGuExecutor(mode=self._args.executor, max_workers=max_workers, hash_type=self._args.hashtype,
+                          initializer=DuGuWorker.init_settings, initargs=(settings,)) \
+                if max_workers > 1 else nullcontext() as executor:
+            for stage in stages:
+                if stage == 'compare':
+                    groups = self.__run_compare_stage(executor=executor, groups=groups)
+                else:
+                    groups = self.__run_stage(executor=executor, groups=groups, stage=stage)
+
+        for group in groups:
+            for info in group:
+                self.__process_result(info)
 
         pf('Scanning %sFiles' % self.__scan_type, status='Done',
            suffix=' \r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
@@ -226,6 +304,7 @@ class DuGuScanCore(DuGuBaseCore):
         else:
             # TODO: log -> save failed
             pass
+        self._hash_index.save(data=self._scan_result, path=self._cwd)
         self._hk_after__init_scan()
 
         return
@@ -251,6 +330,12 @@ class DuGuScanCore(DuGuBaseCore):
     def _hk_if__result_has_info(self, result=DuGuFileInfo()) -> None:
         pass
 
+    def _hk_if__files_are_identical(self, files=None) -> None:
+        pass
+
+    def _hk_if__files_are_hard_linked(self, device=0, inode=0, files=None) -> None:
+        pass
+
     def _hk_after__reset(self) -> None:
         pass
 
@@ -271,15 +356,435 @@ class DuGuScanCore(DuGuBaseCore):
         if result.has_info():
             self._scan_result += result
             self._hk_if__result_has_info(result=result)
+            self.__process_hard_links(result=result)
 
         return
 
-    def __progress(self, i=0) -> int:
+    def __process_hard_links(self, result=DuGuFileInfo()) -> None:
+        """ Register the hard links of the given (registered) file, with its digests. """
+
+        links = self.__hard_links.pop((result.device, result.inode), []) if result.inode else []
+        if not links:
+            return
+
+        for link in links:
+            for stage in ('head', 'tail', 'full'):
+                link.set_digest(stage=stage, digest=result.digest(stage))
+            self._scan_result += link
+
+        self._hk_if__files_are_hard_linked(device=result.device, inode=result.inode,
+                                           files=[result.file] + [link.file for link in links])
+
+    def __skip_hard_links(self, infos=None) -> list:
+        """ Return the given files, but with only the first path of each file (inode). The other paths (hard links)
+            are kept aside, to be registered along with it. (see: __process_hard_links()) """
+
+        ret = []
+        # {(device, inode): DuGuFileInfo, ..}
+        firsts = {}
+        # {(device, inode): [DuGuFileInfo1, DuGuFileInfo2, .., DuGuFileInfoN], ..}
+        self.__hard_links = {}
+
+        for info in infos:
+            key = (info.device, info.inode)
+            if not info.inode or key not in firsts:
+                firsts[key] = info
+                ret.append(info)
+            # a followed symlink resolves to the path of its target, which might have been found already
+            elif info.file != firsts[key].file \
+                    and info.file not in [link.file for link in self.__hard_links.get(key, [])]:
+                self.__hard_links.setdefault(key, []).append(info)
+
+        return ret
+
+    def __inspect_files(self, stage='' or 'head' or 'full', settings=None) -> list:
+        """ Return a list of the inspected DuGuFileInfo of the found files that can be scanned. The files are inspected
+            as soon as they are found, while the rest are still being found.
+
+            Meanwhile, if the given (first) hashing stage is 'head', it's started in the background for each file that
+            is going to need it. (see: __needs_first_stage()) So the disks are already being read while walking. But
+            only a bounded number of its jobs are pending at once. Any other stage is left to the per-device queues,
+            since it's not cheap enough to be read in the order the files are found. """
+
+        ret = []
+        i = 0
+        reused = 0
+
+        # {size: [DuGuFileInfo1, DuGuFileInfo2, .., DuGuFileInfoN], ..} and {(device, inode), ..} of the inspected files
+        sizes = {}
+        inodes = set()
+
+        # the files that are waiting to be sent to the first stage, and {Future: [DuGuFileInfo, ..]} of the sent ones
+        batch = []
+        hashing = {}
+        early = stage == 'head' and self._jobs('hash') > 1
+        max_pending = self._jobs('hash') * MAX_PENDING_JOBS_PER_WORKER
+
+        with DuGuExecutor(mode='thread', max_workers=self._jobs('walk')) if self._jobs('walk') > 1 \
+                else nullcontext() as executor, \
+                DuGuExecutor(mode=self._args.executor, max_workers=self._jobs('hash'), hash_type=self._args.hashtype,
+                             initializer=DuGuWorker.init_settings, initargs=(settings,)) if early \
+                else nullcontext() as hasher:
+            for _, results in self.__run_jobs(executor=executor, fn=DuGuWorker.inspect_files, jobs=self.__walk_jobs()):
+                i += len(results)
+                rp('Checking %sFiles: (%d) \r' % (self.__scan_type, i))
+                for result in results:
+                    if result.has_logs():
+                        for log_msg in result.logs():
+                            log(msg=log_msg, verbose=self._args.verbose, re_print=True)
+                    if result.has_info():
+                        reused += self.__reuse_digests(info=result)
+                        ret.append(result)
+                        if hasher:
+                            # the big files are left to be hashed segment by segment (see: __run_segments())
+                            batch += [info for info in self.__needs_first_stage(info=result, sizes=sizes, inodes=inodes)
+                                      if not info.digest(stage) and not self.__segments(info=info, stage=stage)]
+
+                if batch and (len(batch) >= BATCH_MAX_FILES
+                              or self.__batch_size(batch=batch, stage=stage) >= BATCH_MAX_BYTES):
+                    hashing[self.__submit_hash_job(executor=hasher, batch=batch, stage=stage)] = batch
+                    batch = []
+
+                # wait for some of the pending jobs to be done, before sending any more of them
+                if len(hashing) >= max_pending:
+                    done, _ = futures_wait(hashing, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for info, digest in zip(hashing.pop(future), future.result()):
+                            self.__set_digest(info=info, stage=stage, digest=digest)
+
+            if batch:
+                hashing[self.__submit_hash_job(executor=hasher, batch=batch, stage=stage)] = batch
+
+            for future in futures_as_completed(hashing):
+                for info, digest in zip(hashing[future], future.result()):
+                    self.__set_digest(info=info, stage=stage, digest=digest)
+
+        pf('Checking %sFiles' % self.__scan_type, status='Done',
+           suffix=' \r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
+        if reused:
+            log(msg='Reusing the cached hashes of %d unchanged files.' % reused, verbose=self._args.verbose,
+                re_print=True)
+
+        return ret
+
+    def __reusable_metadata(self, data=None) -> dict:
+        """ Return the metadata of the given (no longer valid) cached scan, if its digests can be reused. Which is
+            unless its big files were hashed with a different segment size. Otherwise, an empty dict. """
+
+        if type(data) is not DuGuScannedData or data.segment_size != self._scan_result.segment_size:
+            return {}
+        return dict(data.metadata)
+
+    def __reuse_digests(self, info=DuGuFileInfo()) -> bool:
+        """ Set the cached digests of the given inspected file, if its (size, mtime, inode) did not change since it was
+            cached. Return True if any of them was reused. """
+
+        cached = self.__cached.get(info.file)
+        if not cached or len(cached) < 6 or cached[0] != info.size or cached[1] != info.mtime \
+                or cached[5] != info.inode:
+            return False
+
+        # [.., hash, head-hash, tail-hash, ..]
+        for stage, digest in zip(('full', 'head', 'tail'), cached[2:5]):
+            if digest:
+                info.set_digest(stage=stage, digest=digest)
+
+        return any(cached[2:5])
+
+    def __walk_jobs(self):
+        """ Yield an inspection job for each batch of WALK_BATCH_FILES found files, as soon as they are found. """
+
+        k = 0
+        batch = []
+        for file, st in self._scan_result.walk():
+            batch.append((file, st))
+            if len(batch) >= WALK_BATCH_FILES:
+                yield k, ([file for file, _ in batch], self._args, [st for _, st in batch]), 0
+                k += 1
+                batch = []
+
+        if batch:
+            yield k, ([file for file, _ in batch], self._args, [st for _, st in batch]), 0
+
+    def __needs_first_stage(self, info=DuGuFileInfo(), sizes=None, inodes=None) -> list:
+        """ Return the given inspected file, and the files that had been inspected before it, if they need the first
+            hashing stage because of it. Which is when its size is shared with other files (or when the files with a
+            unique size are hashed as well), unless it's a hard link to one of them. """
+
+        if info.inode:
+            if (info.device, info.inode) in inodes:
+                return []
+            inodes.add((info.device, info.inode))
+
+        if self._hash_unique_sizes:
+            return [info]
+
+        same_size = sizes.setdefault(info.size, [])
+        same_size.append(info)
+        if len(same_size) == 2:
+            return same_size[:]
+        return [info] if len(same_size) > 2 else []
+
+    def __submit_hash_job(self, executor=None, batch=None, stage='' or 'head' or 'tail' or 'full') -> Future:
+        return executor.submit(DuGuWorker.hash_files, [info.file for info in batch], stage,
+                               size=self.__batch_size(batch=batch, stage=stage))
+
+    def __run_stage(self, executor=None, groups=None, stage='' or 'head' or 'tail' or 'full') -> list:
+        """ Register the files that are alone in their groups (since they can not have any duplicate) without
+            hashing them any further. Then hash the rest with the given stage, and return them regrouped by it. """
+
+        candidates = []
+        for group in groups:
+            if len(group) > 1 or self._hash_unique_sizes:
+                candidates.append(group)
+            else:
+                self.__process_result(group[0])
+
+        # no need to re-hash what is already known
+        todo = [info for group in candidates for info in group if not info.digest(stage)]
+
+        # the big files are hashed segment by segment, by all the workers at once
+        segmented = [info for info in todo if executor and self.__segments(info=info, stage=stage)]
+        todo = [info for info in todo if not (executor and self.__segments(info=info, stage=stage))]
+        i = self.__run_segments(executor=executor, infos=segmented, stage=stage, total=len(todo) + len(segmented))
+
+        # {device: jobs, ..}
+        queues = {device: self.__hash_jobs(infos=infos, stage=stage, read_ahead=executor is None)
+                  for device, infos in self.__by_device(infos=todo).items()}
+
+        total = i + len(todo)
+        concurrencies = self.__concurrencies(executor=executor, devices=queues)
+        for batch, digests in self.__run_jobs(executor=executor, fn=DuGuWorker.hash_files, queues=queues,
+                                              concurrencies=concurrencies):
+            i = self.__progress(i, total, stage=stage, step=len(batch))
+            if batch[0].device in concurrencies:
+                concurrencies[batch[0].device].record(nbytes=self.__batch_size(batch=batch, stage=stage),
+                                                      nfiles=len(batch))
+            for info, digest in zip(batch, digests):
+                self.__set_digest(info=info, stage=stage, digest=digest)
+
+        if total and stage != 'full':
+            pf(self.__stage_msg(stage=stage), status='Done', suffix=' \r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
+
+        return self.__regroup(groups=candidates, stage=stage)
+
+    def __run_segments(self, executor=None, infos=None, stage='' or 'full', total=0) -> int:
+        """ Hash the given files segment by segment, where the segments of each device are hashed side by side by all
+            of its workers. Then set the digest of each file out of its segments' digests, and return how many files
+            were hashed. (see: hash_digests())
+
+            total: how many files this stage is going to hash, to show the progress. """
+
+        # {DuGuFileInfo: [segment-digest1, segment-digest2, .., segment-digestN], ..}
+        digests = {info: [''] * len(self.__segments(info=info, stage=stage)) for info in infos}
+        pending = {info: len(segments) for info, segments in digests.items()}
+
+        # {device: jobs, ..} where each segment is a job, in the order its file should be read
+        queues = {device: [((info, k), ([segment],), min(self.__segment_size, info.size - segment[1]))
+                           for info in device_infos
+                           for k, segment in enumerate(self.__segments(info=info, stage=stage))]
+                  for device, device_infos in self.__by_device(infos=infos).items()}
+
+        i = 0
+        concurrencies = self.__concurrencies(executor=executor, devices=queues)
+        for (info, k), segment_digests in self.__run_jobs(executor=executor, fn=DuGuWorker.hash_segments, queues=queues,
+                                                          concurrencies=concurrencies):
+            if info.device in concurrencies:
+                concurrencies[info.device].record(nbytes=min(self.__segment_size, info.size - k * self.__segment_size),
+                                                  nfiles=1)
+            digests[info][k] = segment_digests[0]
+            pending[info] -= 1
+            if not pending[info]:
+                self.__set_digest(info=info, stage=stage, digest=hash_digests(digests.pop(info), self._args.hashtype))
+                i = self.__progress(i, total, stage=stage)
+
+        return i
+
+    def __run_compare_stage(self, executor=None, groups=None) -> list:
+        """ Register all the given files without hashing their whole contents. But only after comparing the files of
+            each group byte-by-byte, to tell which of them are identical. Then return an empty list of groups. """
+
+        candidates = []
+        for group in groups:
+            # the small files were already fully hashed while sampling their heads. Any other group is compared, and
+            # its files are only registered as identical once they're compared, instead of by their (known) hashes
+            if len(group) > 1 and not all(info.hash for info in group):
+                candidates.append(group)
+                for info in group:
+                    info.set_digest(stage='full', digest='')
+            for info in group:
+                self.__process_result(info)
+
+        # {device: jobs, ..} where each group is queued by the device of its first file, in its read order
+        queues = {}
+        for k in self.__read_order(infos=[group[0] for group in candidates]):
+            queues.setdefault(candidates[k][0].device, []).append((k, ([info.file for info in candidates[k]],), 0))
+
+        i = 0
+        total = len(candidates)
+        concurrencies = self.__concurrencies(executor=executor, devices=queues)
+        for k, (identical_sets, unreadable) in self.__run_jobs(executor=executor, fn=DuGuWorker.compare_files,
+                                                               queues=queues, concurrencies=concurrencies):
+            i = self.__progress(i, total, stage='compare')
+            if candidates[k][0].device in concurrencies:
+                concurrencies[candidates[k][0].device].record(nfiles=len(candidates[k]))
+            for file in unreadable:
+                log(msg='Ignoring Unreadable: %s' % file, verbose=self._args.verbose, re_print=True)
+            for files in identical_sets:
+                self._hk_if__files_are_identical(files=files)
+
+        return []
+
+    def __run_jobs(self, executor=None, fn=None, jobs=None, queues=None, concurrencies=None):
+        """ Yield (key, fn(*args)) for each (key, args, size) of the given jobs, or of the given {device: jobs} queues.
+            Either through the given executor, which keeps only a bounded number of them pending per queue (or as many
+            as the queue's DuGuConcurrency decides), or one after another when there is no executor. """
+
+        queues = queues if queues is not None else {None: jobs}
+        if executor:
+            # with several devices, each one only gets its own share of the workers
+            window = self.__hash_share(devices=queues) if len(queues) > 1 else 0
+            yield from executor.map_queues(fn=fn, queues=queues, window=window, concurrencies=concurrencies)
+        else:
+            for jobs in queues.values():
+                for key, args, _ in jobs:
+                    yield key, fn(*args)
+
+    def __concurrencies(self, executor=None, devices=None) -> dict:
+        """ Return a new DuGuConcurrency for each of the given devices, as {device: DuGuConcurrency}. Or an empty
+            dict if there is no executor, or the number of the hashing workers should not be adapted. """
+
+        if not executor or not self._args.adaptive_jobs:
+            return {}
+        return {device: DuGuConcurrency(max_limit=self.__hash_share(devices=devices)) for device in devices}
+
+    def __hash_share(self, devices=None) -> int:
+        """ Return how many of the hashing workers each of the given devices gets, when they're read side by side. """
+
+        return max(1, ceil(self._jobs('hash') / max(1, len(devices))))
+
+    def __by_device(self, infos=None) -> dict:
+        """ Return the given files grouped by the device they are stored in, as {device: [DuGuFileInfo, ..]}.
+            Where the files of each device are sorted in the order they should be read. (see: --read-order) """
+
+        ret = {}
+        for k in self.__read_order(infos=infos):
+            ret.setdefault(infos[k].device, []).append(infos[k])
+
+        return ret
+
+    def __read_order(self, infos=None) -> list:
+        """ Return the indexes of the given files, in the order they should be read. (see: --read-order) """
+
+        if self._args.read_order == 'walk':
+            return list(range(len(infos)))
+        return sorted(range(len(infos)), key=lambda k: self.__read_position(info=infos[k]))
+
+    def __read_position(self, info=DuGuFileInfo()) -> tuple:
+        """ Return the sort key of the given file, to read the files of a device with as little seeking as possible.
+            The files whose physical offsets are unknown fall back to their inode numbers, after the known ones. """
+
+        if self._args.read_order == 'physical':
+            return not info.offset, info.offset, info.inode
+        return info.inode
+
+    @staticmethod
+    def __batch_size(batch=None, stage='' or 'head' or 'tail' or 'full') -> int:
+        """ Return how many bytes the given batch of files is going to read in the given stage. """
+
+        if stage == 'full':
+            return sum(info.size for info in batch)
+        return sum(min(info.size, PARTIAL_HASH_SIZE) for info in batch)
+
+    def __segments(self, info=DuGuFileInfo(), stage='' or 'head' or 'tail' or 'full') -> list:
+        """ Return the [(file, offset), ..] segments of the given file, if the given stage hashes it segment by
+            segment. Otherwise, an empty list. (see: segment_offsets()) """
+
+        if stage != 'full':
+            return []
+        return [(info.file, offset) for offset in segment_offsets(size=info.size, segment_size=self.__segment_size)]
+
+    def __hash_jobs(self, infos=None, stage='' or 'head' or 'tail' or 'full', read_ahead=False):
+        """ Yield a (batch, args, size) job for each batch of the given files, to hash them with the given stage.
+
+            read_ahead: whether each job should also read ahead the first files of the next batch, which is only
+            worth it when the jobs run one after another. (see: DuGuWorker.hash_files()) """
+
+        batch = None
+        for next_batch in self.__batches(infos=infos, stage=stage):
+            if batch:
+                yield self.__hash_job(batch=batch, stage=stage, upcoming=next_batch if read_ahead else None)
+            batch = next_batch
+
+        if batch:
+            yield self.__hash_job(batch=batch, stage=stage)
+
+    def __hash_job(self, batch=None, stage='' or 'head' or 'tail' or 'full', upcoming=None) -> tuple:
+        """ Return a (batch, args, size) job to hash the given batch, and to read ahead the first upcoming files. """
+
+        upcoming = [info.file for info in upcoming[:max(self._args.prefetch, 0)]] if upcoming else None
+        return batch, ([info.file for info in batch], stage, upcoming), self.__batch_size(batch=batch, stage=stage)
+
+    def __batches(self, infos=None, stage='' or 'head' or 'tail' or 'full'):
+        """ Yield the given files split into batches, where each batch reads up to BATCH_MAX_BYTES,
+            and holds up to BATCH_MAX_FILES files. """
+
+        batch = []
+        batch_size = 0
+        for info in infos:
+            size = self.__batch_size(batch=[info], stage=stage)
+            if batch and (batch_size + size > BATCH_MAX_BYTES or len(batch) >= BATCH_MAX_FILES):
+                yield batch
+                batch = []
+                batch_size = 0
+            batch.append(info)
+            batch_size += size
+
+        if batch:
+            yield batch
+
+    @staticmethod
+    def __set_digest(info=DuGuFileInfo(), stage='' or 'head' or 'tail' or 'full', digest='') -> None:
+        """ Set the given stage's digest. And since a small file's head is its whole contents, its head's digest is
+            also its tail's and full digests. """
+
+        info.set_digest(stage=stage, digest=digest)
+        if stage == 'head' and digest and info.size <= PARTIAL_HASH_SIZE:
+            info.set_digest(stage='tail', digest=digest)
+            info.set_digest(stage='full', digest=digest)
+
+    def __regroup(self, groups=None, stage='' or 'size' or 'head' or 'tail' or 'full') -> list:
+        """ Split each given group by the size, or the digest of the given stage, of its files. """
+
+        # {(group-index, size-or-digest): [DuGuFileInfo1, DuGuFileInfo2, .., DuGuFileInfoN], ..}
+        ret = {}
+        for k, group in enumerate(groups):
+            for info in group:
+                if stage == 'size':
+                    ret.setdefault((k, info.size), []).append(info)
+                elif info.digest(stage):
+                    ret.setdefault((k, info.digest(stage)), []).append(info)
+                else:
+                    log(msg='Ignoring Unreadable: %s' % info.file, verbose=self._args.verbose, re_print=True)
+
+        return list(ret.values())
+
+    def __stage_msg(self, stage='' or 'head' or 'tail' or 'full' or 'compare') -> str:
+        """ Return the progress message of the given hashing stage. """
+
+        if stage == 'head':
+            return 'Sampling %sHeads' % self.__scan_type
+        elif stage == 'tail':
+            return 'Sampling %sTails' % self.__scan_type
+        elif stage == 'compare':
+            return 'Comparing %sFiles' % self.__scan_type
+        return 'Scanning %sFiles' % self.__scan_type
+
+    def __progress(self, i=0, total=0, stage='' or 'head' or 'tail' or 'full' or 'compare', step=1) -> int:
         """ Prints current progress, and return the next int(i) """
 
-        i += 1
-        rp('Scanning %sFiles: (%d/%d) - %d%% \r' % (self.__scan_type, i, len(self._scan_result),
-                                                    (i * 100 / len(self._scan_result))))
+        i += step
+        rp('%s: (%d/%d) - %d%% \r' % (self.__stage_msg(stage=stage), i, total, (i * 100 / total)))
         return i
 
 
@@ -289,6 +794,8 @@ class DuGuScanCore(DuGuBaseCore):
 class DuGuDuplicatesCore(DuGuScanCore):
     """ The main duplicates core object """
 
+    _hash_unique_sizes = False
+
     # ------------------------------
     #        SPECIAL METHODS
     # ------------------------------
@@ -300,7 +807,7 @@ class DuGuDuplicatesCore(DuGuScanCore):
 
         self._dups_cache = DuGuDuplicatesCache(args=args, cwd=args.DIR, _type='dups', cache_desc='Dups')
 
-        self._dups_result = DuGuDuplicatesData(total_files=len(self._scan_result), hash_type=self._args.hashtype)
+        self._dups_result = DuGuDuplicatesData(hash_type=self._args.hashtype)
 
     # ------------------------------
     #           PROPERTIES
@@ -326,6 +833,10 @@ class DuGuDuplicatesCore(DuGuScanCore):
     def _hk_if__cache_is_loaded(self) -> None:
         if self._dups_cache.load():
             self._dups_result = self._dups_cache.content
+        # the hashed duplicates can be found again out of the scan cache, without scanning again
+        elif not self._args.compare and self._scan_cache.duplicates(dups=self._dups_result):
+            self._dups_result.calculate(total_files=len(self._scan_result))
+            self._dups_cache.save(self.duplicates_result)
         else:
             self._init_scan()
 
@@ -340,7 +851,7 @@ class DuGuDuplicatesCore(DuGuScanCore):
         self.__need_scan = True
 
     def _hk_after__init_scan(self) -> None:
-        self._dups_result.calculate()
+        self._dups_result.calculate(total_files=len(self._scan_result))
         if self._dups_cache.save(self.duplicates_result):
             # TODO: log -> save -> done
             pass
@@ -351,6 +862,12 @@ class DuGuDuplicatesCore(DuGuScanCore):
     def _hk_if__result_has_info(self, result=DuGuFileInfo()) -> None:
         self._dups_result.check(result=result)
 
+    def _hk_if__files_are_identical(self, files=None) -> None:
+        self._dups_result.check_identical(files=files)
+
+    def _hk_if__files_are_hard_linked(self, device=0, inode=0, files=None) -> None:
+        self._dups_result.check_hard_links(device=device, inode=inode, files=files)
+
     def _hk_after__reset(self) -> None:
         self._dups_result.reset()
 
@@ -488,7 +1005,7 @@ class DuGuUniqueCore(DuGuBaseCore):
         # make sure we have enough space
         disk_available_space = shutil_disk_usage(self._args.DIRS[0]).free
         src_size = get_dir_size(dir_path=self._args.DIRS[0], follow_links=self._args.follow_symlinks,
-                                show_progress=True, verbose=self._args.verbose, re_print=True)
+                                show_progress=True, verbose=self._args.verbose, re_print=True, jobs=self._jobs('walk'))
         if disk_available_space <= src_size:
             log(msg='Canceling the copy process. Since the available disk space in "%s" is (%s) which is less than the '
                     'minimum required space (%s).!' % (self._args.DIRS[0],
@@ -517,7 +1034,7 @@ class DuGuUniqueCore(DuGuBaseCore):
         for file, info in self._src_scan.result().metadata.items():
             rpf(msg=msg, status=' %s' % waiting_indicator(), suffix=' \r', max_cols=MAX_LINE_COLUMNS)
             if info[2] not in self._dst_scan.result().hashes:
-                self._unique_result += DuGuFileInfo(file=file, size=info[0], date=info[1], _hash=info[2])
+                self._unique_result += DuGuFileInfo(file=file, size=info[0], mtime=info[1], _hash=info[2])
 
         if len(self._unique_result.files_list) > 0:
             pf(msg=msg, status='Done', suffix=' \r', max_cols=MAX_LINE_COLUMNS)
@@ -538,17 +1055,33 @@ class DuGuUniqueCore(DuGuBaseCore):
         total = len(self._unique_result.files_list)
         i = 0
 
-        for file in self._unique_result.files_list:
-            i += 1
-            rp('Copying Unique Files: (%d/%d) - %d%% \r' % (i, total, (i * 100 / total)))
-            if not copy_file_to_replicant(file=file, start_dir=self.src_path, dst_dir=self.unique_path,
-                                          follow_symlinks=self._args.symlinks, verbose=self._args.verbose,
-                                          re_print=True):
-                self._not_copied_files.append(file)
+        jobs = ((file, (), 0) for file in self._unique_result.files_list)
+        with DuGuExecutor(mode='thread', max_workers=self._jobs('copy')) if self._jobs('copy') > 1 \
+                else nullcontext() as executor:
+            for file, copied in self.__run_copy_jobs(executor=executor, jobs=jobs):
+                i += 1
+                rp('Copying Unique Files: (%d/%d) - %d%% \r' % (i, total, (i * 100 / total)))
+                if not copied:
+                    self._not_copied_files.append(file)
         pf('Copying Unique Files', status='Done', suffix=' \r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
 
         return
 
+    def __run_copy_jobs(self, executor=None, jobs=None):
+        """ Yield (file, True|False) for each file of the given jobs, depending on whether or not it's been copied.
+            Either through the given executor, or one after another when there is no executor. """
+
+        def _copy(file=None) -> bool:
+            return copy_file_to_replicant(file=file, start_dir=self.src_path, dst_dir=self.unique_path,
+                                          follow_symlinks=self._args.symlinks, verbose=self._args.verbose,
+                                          re_print=True)
+
+        if executor:
+            yield from executor.map_unordered(fn=_copy, jobs=((file, (file,), size) for file, _, size in jobs))
+        else:
+            for file, _, _ in jobs:
+                yield file, _copy(file=file)
+
     def __cp_src_dir_structure(self) -> bool:
         """ Return True if we successfully copied the Source-Directory's structure
             to the unique directory's path. Otherwise, return False. """
@@ -16,12 +16,19 @@
 
 # Standard library imports
 from __future__ import absolute_import
+from os import stat as os_stat
+from time import (
+    strftime as time_strftime,
+    localtime as time_localtime,
+)
 
 # Third party imports
 
 # Local application imports
+from dugu.constants import DATETIME_FORMAT
 from dugu.utils import (
     find_files_recursively,
+    walk_files,
     hash_string,
     os_path,
     _exit,
@@ -39,13 +46,19 @@ class DuGuFileInfo:
     #        SPECIAL METHODS
     # ------------------------------
 
-    def __init__(self, file: str = '', size: int = 0, date: str = '', _hash: str = '') -> None:
+    def __init__(self, file: str = '', size: int = 0, mtime: int = 0, _hash: str = '') -> None:
         self.__file = file
         self.__size = size
-        self.__date = date
+        self.__mtime = mtime
         self.__hash = _hash
+        self.__head = ''
+        self.__tail = ''
+        self.__device = 0
+        self.__inode = 0
+        self.__offset = 0
         self.__logs = []
-        self.__has_info = True if file and size and date and _hash else False
+        # a raw mtime of 0 is still a valid one (ex: 'touch -d @0'), so it's not checked like the rest
+        self.__has_info = True if file and size and _hash else False
 
     # ------------------------------
     #          PROPERTIES
@@ -58,11 +71,32 @@ class DuGuFileInfo:
     def size(self) -> int: return self.__size
 
     @property
-    def date(self) -> str: return self.__date
+    def mtime(self) -> int: return self.__mtime
+
+    @property
+    def date(self) -> str:
+        """ Return the modified time, formatted to be displayed. """
+
+        return time_strftime(DATETIME_FORMAT, time_localtime(self.__mtime / 1e9))
 
     @property
     def hash(self) -> str: return self.__hash
 
+    @property
+    def head(self) -> str: return self.__head
+
+    @property
+    def tail(self) -> str: return self.__tail
+
+    @property
+    def device(self) -> int: return self.__device
+
+    @property
+    def inode(self) -> int: return self.__inode
+
+    @property
+    def offset(self) -> int: return self.__offset
+
     # ------------------------------
     #           PUBLIC
     # ------------------------------
@@ -81,13 +115,40 @@ class DuGuFileInfo:
 
     # --------( FILE INFO )---------
 
-    def set_info(self, f_name='', f_size=0, f_date='', f_hash='') -> None:
+    def set_info(self, f_name='', f_size=0, f_mtime=0, f_hash='', f_device=0, f_inode=0, f_offset=0) -> None:
         self.__file = f_name
         self.__size = f_size
-        self.__date = f_date
+        self.__mtime = f_mtime
         self.__hash = f_hash
+        self.__device = f_device
+        self.__inode = f_inode
+        self.__offset = f_offset
         self.__has_info = True
 
+    def set_hash(self, f_hash='') -> None:
+        self.__hash = f_hash
+
+    def set_digest(self, stage='' or 'head' or 'tail' or 'full', digest='') -> None:
+        """ Set the digest of the given hashing stage. """
+
+        if stage == 'head':
+            self.__head = digest
+        elif stage == 'tail':
+            self.__tail = digest
+        elif stage == 'full':
+            self.__hash = digest
+
+    def digest(self, stage='' or 'head' or 'tail' or 'full') -> str:
+        """ Return the digest of the given hashing stage, or an empty string if it has not been calculated. """
+
+        if stage == 'head':
+            return self.__head
+        elif stage == 'tail':
+            return self.__tail
+        elif stage == 'full':
+            return self.__hash
+        return ''
+
     def has_info(self) -> bool:
         return self.__has_info
 
@@ -97,53 +158,78 @@ class DuGuFileInfo:
 
 class DuGuScannedData:
 
+    # Whether or not the files have been found. (the caches of the older versions, have always found them)
+    __walked = True
+
+    # How many bytes each segment of the big files has, when they are hashed segment by segment. (the caches of the
+    # older versions, have always hashed the whole contents at once)
+    __segment_size = 0
+
+    # The (files, results) callables of a restore that is not read yet. (see: restore())
+    __restoring = None
+
     # ------------------------------
     #        SPECIAL METHODS
     # ------------------------------
 
-    def __init__(self, cwd='', which=None, show_progress=True, follow_symlinks=False) -> None:
+    def __init__(self, cwd='', which=None, show_progress=True, follow_symlinks=False, walk_jobs=1,
+                 segment_size=0) -> None:
+        # the files are only found once they are needed. (see: walk())
+        self.__walk_args = {'path': cwd, 'which': which, 'show_progress': show_progress,
+                            'follow_links': follow_symlinks, 'jobs': walk_jobs}
+        self.__walked = False
+
+        # the hashes of the big files depend on it. (see: dugu.utils.segment_offsets())
+        self.__segment_size = segment_size
+
         # [filepath1, filepath2, .., filepathN]
-        self.__files_list = find_files_recursively(path=cwd, which=which, show_progress=show_progress,
-                                                   follow_links=follow_symlinks)
+        self.__files_list = []
+
+        # [os.stat_result1, os.stat_result2, .., os.stat_resultN] the lstat of each found file, while walking.
+        # (see: release_stats())
+        self.__files_stats = []
 
         self.__hashes_list = []
 
-        self.__total_files = len(self.__files_list)
+        self.__total_files = 0
 
-        # {filepath: [size, date, hash], ..}
+        # {filepath: [size, mtime, hash, head-hash, tail-hash, inode, device], ..}
         self.__metadata = {}
 
         # total found files size
         self.__total_size = 0
 
-        # store all hashes in one variable to re-hash it, to generate a unique id
-        self.__all_hashes = ''
-
     # len()
     def __len__(self) -> int:
+        self.__find_files()
         return self.__total_files
 
     # +=
     def __iadd__(self, result=DuGuFileInfo):
+        self.__restore()
         if result and type(result) is DuGuFileInfo:
-            self.__metadata[result.file] = [result.size, result.date, result.hash]
+            self.__metadata[result.file] = [result.size, result.mtime, result.hash, result.head, result.tail,
+                                            result.inode, result.device]
             self.__total_size += result.size
-            self.__all_hashes += '%s;' % result.hash
-            self.__hashes_list.append(result.hash)
+            # files with a unique size are registered without being hashed
+            if result.hash:
+                self.__hashes_list.append(result.hash)
         return self
 
     # in
     def __contains__(self, item) -> bool:
+        self.__find_files()
+        self.__restore()
         return item in self.__files_list
 
     # ---( COMPARISON OPERATORS )---
 
-    def __lt__(self, other) -> bool: return self.__total_files < other
-    def __le__(self, other) -> bool: return self.__total_files <= other
-    def __gt__(self, other) -> bool: return self.__total_files > other
-    def __ge__(self, other) -> bool: return self.__total_files >= other
-    def __eq__(self, other) -> bool: return self.__total_files == other
-    def __ne__(self, other) -> bool: return self.__total_files != other
+    def __lt__(self, other) -> bool: return len(self) < other
+    def __le__(self, other) -> bool: return len(self) <= other
+    def __gt__(self, other) -> bool: return len(self) > other
+    def __ge__(self, other) -> bool: return len(self) >= other
+    def __eq__(self, other) -> bool: return len(self) == other
+    def __ne__(self, other) -> bool: return len(self) != other
 
     # ------------------------------
     #          PROPERTIES
@@ -155,6 +241,8 @@ class DuGuScannedData:
 
             Ex: [filepath1, filepath2, .., filepathN]."""
 
+        self.__find_files()
+        self.__restore()
         return self.__files_list
 
     @property
@@ -163,20 +251,40 @@ class DuGuScannedData:
 
             Ex: [hash1, hash2, .., hashN]."""
 
+        self.__restore()
         return self.__hashes_list
 
     @property
     def metadata(self) -> dict:
         """ Return a dict of files info indexed by files.
+            The hash is an empty string for the files that were never fully hashed (ex: had a unique size, or their
+            head or tail hashes were unique). And so are the head and tail hashes if they were never calculated.
+
+            The mtime is the raw modified time in nanoseconds. (st_mtime_ns)
 
-            Ex: {filepath: [size, date, hash], ..}"""
+            Ex: {filepath: [size, mtime, hash, head-hash, tail-hash, inode, device], ..}"""
 
+        self.__restore()
         return self.__metadata
 
+    @property
+    def segment_size(self) -> int:
+        """ Return how many bytes each segment of the big files has, when they are hashed segment by segment. """
+
+        return self.__segment_size
+
+    @property
+    def is_fully_hashed(self) -> bool:
+        """ Return True if every registered file has its hash, otherwise False. """
+
+        self.__restore()
+        return all(arr[2] for arr in self.__metadata.values())
+
     @property
     def size(self) -> int:
         """ Return the total found files size. """
 
+        self.__restore()
         return self.__total_size
 
     # ------------------------------
@@ -184,14 +292,87 @@ class DuGuScannedData:
     # ------------------------------
 
     def id(self) -> str:
-        """ Return a unique id of the scanned files. """
+        """ Return a unique id of the scanned files. Which does not depend on the order they were scanned in. """
+
+        self.__restore()
+        return hash_string(string=''.join('%s;' % _hash for _hash in sorted(self.__hashes_list)), hash_type='md5')
+
+    def walk(self):
+        """ Yield (file, os.stat_result) for each found file, as soon as it's found. So the found files can be
+            processed while the rest are still being found. (see: dugu.utils.walk_files())
+            If they have already been found, they are yielded (along with their kept stats) right away. """
+
+        if self.__walked:
+            self.__restore()
+            stats = self.release_stats() or [None] * self.__total_files
+            yield from zip(self.__files_list, stats)
+            return
+
+        self.__files_list = []
+        for file, st in walk_files(path=self.__walk_args['path'], follow_links=self.__walk_args['follow_links'],
+                                   jobs=self.__walk_args['jobs']):
+            self.__files_list.append(file)
+            yield file, st
+
+        self.__total_files = len(self.__files_list)
+        self.__walked = True
+
+    def release_stats(self) -> list:
+        """ Return the lstat of each found file (in the same order as the files), which were taken while walking.
+            And stop keeping them, since they are only needed once, and should not be cached. """
 
-        return hash_string(string=self.__all_hashes, hash_type='md5')
+        ret, self.__files_stats = self.__files_stats, []
+        return ret
+
+    def restore(self, files=None, results=None, total_files=0) -> None:
+        """ Set the given found files, and register the given DuGuFileInfo results, as if they were just found and
+            scanned. (ex: out of a cache)
+
+            Both of them can also be callables that return them, along with how many files were found (total_files).
+            So they are only read once they are needed. (ex: out of a memory-mapped cache) """
+
+        self.__restoring = None
+        self.reset()
+        self.__hashes_list = []
+        self.__walked = True
+        if callable(files) and callable(results):
+            self.__restoring = (files, results)
+            self.__files_list = []
+            self.__total_files = total_files
+            return
+
+        self.__files_list = list(files or [])
+        self.__total_files = len(self.__files_list)
+        for result in results or []:
+            self.__iadd__(result)
 
     def reset(self) -> None:
+        self.__restore()
         self.__metadata = {}
         self.__total_size = 0
-        self.__all_hashes = ''
+
+    # ------------------------------
+    #           PRIVATE
+    # ------------------------------
+
+    def __restore(self) -> None:
+        """ Read the found files and the results of the restore that is not read yet, if any. (see: restore()) """
+
+        if self.__restoring:
+            files, results = self.__restoring
+            self.restore(files=files(), results=results())
+
+    def __find_files(self) -> None:
+        """ Find all the files at once (showing the progress), unless they have already been found. """
+
+        if self.__walked:
+            return
+
+        found = find_files_recursively(with_stats=True, **self.__walk_args)
+        self.__files_list = [file for file, _ in found]
+        self.__files_stats = [st for _, st in found]
+        self.__total_files = len(self.__files_list)
+        self.__walked = True
 
 
 # ----------------------------------------------------------------------
@@ -228,6 +409,12 @@ class DuGuDuplicatesData:
         # {hash: [filepath1, filepath2, ..., filepathN], ...} (old name: tmp_dup_list)
         self.__tmp_dup_list = {}
 
+        # {device:inode: [filepath1, filepath2, ..., filepathN], ...}
+        self.__hard_linked_files = {}
+
+        # how many paths are hard links to an already found file
+        self.__total_hard_links = 0
+
     def __len__(self) -> int:
         """ Return the total found duplicates. """
 
@@ -288,11 +475,30 @@ class DuGuDuplicatesData:
 
         return self.__duplicated_files
 
+    @property
+    def hard_links(self) -> int:
+        """ Return how many of the found files are hard links to other found files. (which take no extra space) """
+
+        return self.__total_hard_links
+
+    @property
+    def hard_linked_files(self) -> dict:
+        """ Return a dictionary of the paths that share the same file (inode), indexed by "device:inode".
+
+            ex: {device:inode1: [filepath1, filepath2, ..., filepathN],
+                ..,
+                device:inodeN: [filepath1, filepath2, ..., filepathN]}. """
+
+        return self.__hard_linked_files
+
     # ------------------------------
     #           PUBLIC
     # ------------------------------
 
     def check(self, result=DuGuFileInfo) -> bool:
+        if not result.hash:
+            return False
+
         if result.hash in self.__tmp_dup_list:
             # if result.hash not in self.__duplicated_files:
             if result.hash not in self:
@@ -310,17 +516,46 @@ class DuGuDuplicatesData:
             self.__tmp_dup_list[result.hash] = result.file
             return False
 
+    def check_identical(self, files=None) -> bool:
+        """ Register the given files as a set of duplicates, after they were compared byte-by-byte instead of being
+            hashed. Since they have no hash, the set is indexed by the hash of their paths. """
+
+        if not files or len(files) < 2:
+            return False
+
+        self.__duplicated_files[hash_string(string=';'.join(sorted(files)), hash_type=self.__hash_type)] = list(files)
+        return True
+
+    def check_hard_links(self, device=0, inode=0, files=None) -> bool:
+        """ Register the given files as paths of the same file (inode). They are not duplicates, since removing any
+            of them would not free any space. """
+
+        if not files or len(files) < 2:
+            return False
+
+        self.__hard_linked_files['%s:%s' % (device, inode)] = list(files)
+        return True
+
     # TODO: implement this in multiprocessing ?
-    def calculate(self) -> None:
+    def calculate(self, total_files=0) -> None:
+        """ Calculate the totals of the found duplicates. (once)
+
+            total_files: the total found files, if it was not known while initiating. """
+
+        if total_files:
+            self.__total_files = total_files
+
         if not self.__calculated:
             count, size = 0, 0
             for sig, files in self.__duplicated_files.items():
                 count += len(files) - 1
-                size += os_path.getsize(files[0]) * (len(files) - 1)
+                # the paths that share an inode, share their space as well
+                size += os_path.getsize(files[0]) * (len(self.__inodes(files=files)) - 1)
 
             self.__duplicate_sets = len(self.__duplicated_files)
             self.__total_duplicates = count
             self.__duplicates_size = size
+            self.__total_hard_links = sum(len(files) - 1 for files in self.__hard_linked_files.values())
             self.__calculated = True
 
     def reset(self):
@@ -329,8 +564,28 @@ class DuGuDuplicatesData:
         self.__duplicates_size = 0
         self.__duplicated_files = {}
         self.__tmp_dup_list = {}
+        self.__hard_linked_files = {}
+        self.__total_hard_links = 0
         self.__calculated = False
 
+    # ------------------------------
+    #           PRIVATE
+    # ------------------------------
+
+    @staticmethod
+    def __inodes(files=None) -> set:
+        """ Return the (device, inode) of each of the given files. (or its path if it could not be stat'ed) """
+
+        ret = set()
+        for file in files:
+            try:
+                st = os_stat(file)
+                ret.add((st.st_dev, st.st_ino))
+            except OSError as _:
+                ret.add(file)
+
+        return ret
+
 
 # ----------------------------------------------------------------------
 
@@ -350,7 +605,7 @@ class DuGuUniqueData:
         self.__files_list = []
 
         # dictionary of uniq files
-        # ex: {'filepath1: [size, date, hash], ..}
+        # ex: {'filepath1: [size, mtime, hash], ..}
         self.__files_info = {}
 
         # total unique size
@@ -359,7 +614,7 @@ class DuGuUniqueData:
     def __iadd__(self, data: DuGuFileInfo = None):
         if data and type(data) is DuGuFileInfo and data.has_info():
             self.__files_list.append(data.file)
-            self.__files_info[data.file] = [data.size, data.date, data.hash]
+            self.__files_info[data.file] = [data.size, data.mtime, data.hash]
             self.__files_size += data.size
         return self
 
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
+# ----------------------------------------------------------------------
+# Script:   DuGu (The Duplicates Guru)
+# Version:  1.x.x
+# Author:   DeaDSouL (Mubarak Alrashidi)
+# URL:      https://unix.cafe/
+# GitLab:   https://gitlab.com/DeaDSouL/dugu
+# Twitter:  https://twitter.com/_DeaDSouL_
+# License:  GPLv3
+# ----------------------------------------------------------------------
+# DuGu helps to you find, remove and avoid the duplicates.
+# ----------------------------------------------------------------------
+
+
+# Standard library imports
+from __future__ import absolute_import
+from time import perf_counter
+from concurrent.futures import (
+    wait as futures_wait,
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+)
+
+# Third party imports
+
+# Local application imports
+from dugu.constants import (
+    MAX_PENDING_JOBS_PER_WORKER,
+    CONCURRENCY_INTERVAL,
+    CONCURRENCY_TOLERANCE,
+    CONCURRENCY_DECREASE,
+    EXECUTOR_PROCESS_MIN_SIZE,
+    EXECUTOR_CPU_BOUND_SPEED,
+)
+from dugu.utils import (
+    hash_speed,
+    available_cpus,
+)
+
+
+# ----------------------------------------------------------------------
+
+
+class DuGuExecutor:
+    """ Runs the workers' jobs in a pool of threads, a pool of processes, or both of them.
+
+        mode: is one of:
+            'thread'  -> run all jobs in threads.
+            'process' -> run all jobs in processes.
+            'auto'    -> run the jobs of the big files in processes when hashing is CPU-bound, and the rest
+                         in threads. """
+
+    # ------------------------------
+    #        SPECIAL METHODS
+    # ------------------------------
+
+    def __init__(self, mode='' or 'auto' or 'thread' or 'process', max_workers=0,
+                 hash_type='md5', initializer=None, initargs=()) -> None:
+        """ max_workers: the size of each pool. (default: the number of the CPUs that DuGu can use)
+            initializer & initargs: are passed to the pools, to be called once by each of their workers. """
+
+        self.__mode = mode if mode in ('thread', 'process') else 'auto'
+        self.__max_workers = max_workers if max_workers > 0 else available_cpus()
+        self.__initializer = initializer
+        self.__initargs = initargs
+        self.__threads = None
+        self.__processes = None
+
+        # hashing is CPU-bound, when a single core can not keep up with a fast disk
+        self.__cpu_bound = self.__mode == 'auto' and hash_speed(hash_type=hash_type) < EXECUTOR_CPU_BOUND_SPEED
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> bool:
+        self.shutdown()
+        return False
+
+    # ------------------------------
+    #          PROPERTIES
+    # ------------------------------
+
+    @property
+    def mode(self) -> str:
+        """ Return the executor mode. Which is one of: 'auto', 'thread' or 'process'. """
+
+        return self.__mode
+
+    @property
+    def max_workers(self) -> int:
+        return self.__max_workers
+
+    # ------------------------------
+    #           PUBLIC
+    # ------------------------------
+
+    def submit(self, fn, *args, size=0) -> Future:
+        """ Schedule fn(*args) in the pool that suits the given size of the data it is going to read. """
+
+        return self.__pool(size=size).submit(fn, *args)
+
+    def map_unordered(self, fn, jobs=None, window=0, concurrency=None):
+        """ Yield (key, fn(*args)) for each (key, args, size) of the given jobs, in the order they get done.
+            No more than the given window (default: MAX_PENDING_JOBS_PER_WORKER per worker) of jobs are pending at any
+            time, and the next jobs are only taken from the given iterable when the pending ones get done.
+
+            concurrency: a DuGuConcurrency, which (if given) decides the window while the jobs are running. """
+
+        yield from self.map_queues(fn=fn, queues={None: jobs}, window=window,
+                                   concurrencies={None: concurrency} if concurrency else None)
+
+    def map_queues(self, fn, queues=None, window=0, concurrencies=None):
+        """ Same as map_unordered(), but for several queues of jobs (ex: one per device) which run side by side.
+            Each queue has its own window of pending jobs, so a slow queue can not hold back the others. And when both
+            the pools are used ('auto'), no more than max_workers of jobs are pending in both of them at once.
+
+            queues: {name: jobs, ..}
+            concurrencies: {name: DuGuConcurrency, ..}, which (if given) decides the window of each named queue. """
+
+        window = window if window > 0 else self.__max_workers * MAX_PENDING_JOBS_PER_WORKER
+        # when both pools are used, they share the same max_workers of running jobs. Otherwise, each of them would
+        # run max_workers of jobs at once
+        budget = self.__max_workers if self.__cpu_bound else float('inf')
+        concurrencies = concurrencies or {}
+        queues = {name: iter(jobs) for name, jobs in queues.items()}
+        counts = dict.fromkeys(queues, 0)
+        pending = {}
+
+        while True:
+            # one job of each queue at a time, so the queues get their turns evenly out of the budget
+            submitted = True
+            while submitted and len(pending) < budget:
+                submitted = False
+                for name in list(queues):
+                    limit = concurrencies[name].limit if name in concurrencies else window
+                    if counts[name] >= limit or len(pending) >= budget:
+                        continue
+                    job = next(queues[name], None)
+                    if job is None:
+                        del queues[name]
+                        continue
+                    key, args, size = job
+                    pending[self.submit(fn, *args, size=size)] = (name, key)
+                    counts[name] += 1
+                    submitted = True
+
+            if not pending:
+                return
+
+            done, _ = futures_wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = pending.pop(future)
+                counts[name] -= 1
+                yield key, future.result()
+
+    def shutdown(self, wait=True) -> None:
+        for pool in (self.__threads, self.__processes):
+            if pool is not None:
+                pool.shutdown(wait=wait)
+        self.__threads = None
+        self.__processes = None
+
+    # ------------------------------
+    #           PRIVATE
+    # ------------------------------
+
+    def __pool(self, size=0) -> ThreadPoolExecutor or ProcessPoolExecutor:
+        """ Return the pool that suits the given size, after creating it if it's the first time to be used. """
+
+        if self.__mode == 'process' or (self.__cpu_bound and size >= EXECUTOR_PROCESS_MIN_SIZE):
+            if self.__processes is None:
+                self.__processes = ProcessPoolExecutor(max_workers=self.__max_workers,
+                                                       initializer=self.__initializer, initargs=self.__initargs)
+            return self.__processes
+
+        if self.__threads is None:
+            self.__threads = ThreadPoolExecutor(max_workers=self.__max_workers,
+                                                initializer=self.__initializer, initargs=self.__initargs)
+        return self.__threads
+
+
+# ----------------------------------------------------------------------
+
+
+class DuGuConcurrency:
+    """ Decides how many jobs should run at once, out of the throughput that is measured while their results come back.
+        The best number differs widely between a spinning disk, an SSD and a network mount. So it's adapted with AIMD:
+        it's increased by one every CONCURRENCY_INTERVAL seconds, as long as the throughput keeps up. And once the
+        throughput drops by more than CONCURRENCY_TOLERANCE, it's multiplied by CONCURRENCY_DECREASE. """
+
+    # ------------------------------
+    #        SPECIAL METHODS
+    # ------------------------------
+
+    def __init__(self, max_limit=0, limit=0) -> None:
+        """ max_limit: the maximum number of jobs to run at once. (usually: the size of the pool)
+            limit: the number of jobs to start with. (default: half of max_limit) """
+
+        self.__max_limit = max(1, max_limit)
+        self.__limit = min(max(1, limit or self.__max_limit // 2), self.__max_limit)
+
+        # what has been done in the current interval
+        self.__started = perf_counter()
+        self.__bytes = 0
+        self.__files = 0
+
+        # the throughput of the previous interval, as (bytes/sec, files/sec)
+        self.__last_rate = None
+
+    # ------------------------------
+    #          PROPERTIES
+    # ------------------------------
+
+    @property
+    def limit(self) -> int:
+        """ Return how many jobs should run at once. """
+
+        return self.__limit
+
+    @property
+    def max_limit(self) -> int:
+        return self.__max_limit
+
+    # ------------------------------
+    #           PUBLIC
+    # ------------------------------
+
+    def record(self, nbytes=0, nfiles=0) -> int:
+        """ Register a done job, which read the given bytes of the given files. Then return the (adapted) limit. """
+
+        self.__bytes += nbytes
+        self.__files += nfiles
+
+        elapsed = perf_counter() - self.__started
+        if elapsed < CONCURRENCY_INTERVAL:
+            return self.__limit
+
+        rate = (self.__bytes / elapsed, self.__files / elapsed)
+        if self.__last_rate is not None and self.__dropped(rate=rate, last_rate=self.__last_rate):
+            self.__limit = max(1, int(self.__limit * CONCURRENCY_DECREASE))
+        else:
+            self.__limit = min(self.__limit + 1, self.__max_limit)
+
+        self.__last_rate = rate
+        self.__started = perf_counter()
+        self.__bytes = 0
+        self.__files = 0
+
+        return self.__limit
+
+    # ------------------------------
+    #           PRIVATE
+    # ------------------------------
+
+    @staticmethod
+    def __dropped(rate=(0.0, 0.0), last_rate=(0.0, 0.0)) -> bool:
+        """ Return True if the given throughput dropped compared to the last one. It compares the bytes/sec, unless
+            nothing was read (ex: empty files), then it compares the files/sec. """
+
+        k = 0 if rate[0] > 0 and last_rate[0] > 0 else 1
+        return rate[k] < last_rate[k] * (1 - CONCURRENCY_TOLERANCE)
+
+
+# ----------------------------------------------------------------------
+
+
+if __name__ == '__main__':
+    print('This file is part of DuGu package.')
+    exit('And is not meant to run directly.')
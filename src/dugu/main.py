@@ -148,6 +148,8 @@ class DuGuMain:
             p()
             pl(MAX_LINE_COLUMNS)
             p('No duplicates found.')
+            if dups_data.hard_links > 0:
+                p('    Hard Links : %s (taking no extra space)' % dups_data.hard_links)
             pl(MAX_LINE_COLUMNS)
         else:
             gen_links_dir = None
@@ -174,6 +176,8 @@ class DuGuMain:
             p('    Duplicates : %s' % dups_data.duplicates)
             p('          Sets : %s' % dups_data.sets)
             p('     Occupying : %s' % bytes_to_readable_units(dups_data.size))
+            if dups_data.hard_links > 0:
+                p('    Hard Links : %s (taking no extra space)' % dups_data.hard_links)
             p('Hash Signature : %s' % self.args.hashtype)
             pl(MAX_LINE_COLUMNS)
 
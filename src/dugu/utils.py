@@ -17,20 +17,76 @@
 # Standard library imports
 from __future__ import absolute_import
 from multiprocessing import cpu_count
+from stat import S_ISLNK
+from math import ceil
+from mmap import (
+    mmap,
+    ACCESS_READ,
+)
+from threading import local as threading_local
+from errno import (
+    EINVAL,
+    ENXIO,
+)
 from sys import exit as sys_exit
 from contextlib import suppress
 from os import (
     path as os_path,
     walk as os_walk,
+    scandir as os_scandir,
+    stat as os_stat,
     makedirs as os_mkdir,
     rmdir as os_rmdir,
     listdir as os_listdir,
     access as os_access,
     remove as os_remove,
+    open as os_open,
+    close as os_close,
+    fstat as os_fstat,
+    lseek as os_lseek,
+    O_RDONLY,
     R_OK,
     W_OK,
 )
+try:
+    from os import sched_getaffinity as os_sched_getaffinity
+except ImportError as _:  # it's not available on every platform. (ex: macOS)
+    os_sched_getaffinity = None
+try:
+    from os import (
+        posix_fadvise as os_posix_fadvise,
+        POSIX_FADV_WILLNEED,
+        POSIX_FADV_DONTNEED,
+        POSIX_FADV_NOREUSE,
+    )
+except ImportError as _:  # it's not available on every platform. (ex: macOS, Windows)
+    os_posix_fadvise = POSIX_FADV_WILLNEED = POSIX_FADV_DONTNEED = POSIX_FADV_NOREUSE = None
+try:
+    from os import (
+        SEEK_DATA as os_SEEK_DATA,
+        SEEK_HOLE as os_SEEK_HOLE,
+    )
+except ImportError as _:  # it's not available on every platform. (ex: Windows)
+    os_SEEK_DATA = os_SEEK_HOLE = None
+try:
+    from os import (
+        preadv as os_preadv,
+        O_DIRECT,
+    )
+except ImportError as _:  # it's not available on every platform. (ex: macOS, Windows)
+    os_preadv = None
+try:
+    from fcntl import ioctl as fcntl_ioctl
+except ImportError as _:  # it's not available on every platform. (ex: Windows)
+    fcntl_ioctl = None
+from struct import (
+    pack as struct_pack,
+    unpack_from as struct_unpack_from,
+    calcsize as struct_calcsize,
+)
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import mkdtemp
+from time import perf_counter
 from shutil import (
     move as mv,
     copytree,
@@ -50,6 +106,14 @@ from hashlib import (
 # Local application imports
 from dugu.constants import (
     MAX_LINE_COLUMNS,
+    MAX_PENDING_JOBS_PER_WORKER,
+    COMPARE_BLOCK_SIZE,
+    COMPARE_MAX_OPEN_FILES,
+    DROP_BEHIND_SIZE,
+    DIRECT_IO_ALIGNMENT,
+    HASH_BLOCK_SIZE,
+    MMAP_MIN_SIZE,
+    SEGMENTED_HASH_MIN_SEGMENTS,
     DEFAULT_TMP_PATH,
     DUGU_BASE_PATH,
 )
@@ -71,8 +135,26 @@ from dugu.version import ver
 # ------------------------------
 
 
-def hash_file_contents(filename, hash_type='md5') -> str:
-    """Returns the md5, sha1, sha256 or sha512 hash of the given file"""
+# The reading buffer of each thread. (see: _read_buffer())
+_buffers = threading_local()
+
+# The zeros that the holes of the sparse files are hashed as. (see: _hash_zeros())
+_ZEROS = memoryview(bytes(HASH_BLOCK_SIZE))
+
+
+def hash_file_contents(filename, hash_type='md5', offset=0, length=-1, io_mode='cached', block_size=HASH_BLOCK_SIZE,
+                       use_mmap=False) -> str:
+    """Returns the md5, sha1, sha256 or sha512 hash of the given file.
+
+        offset: where to start reading from. A negative offset is counted from the end of the file.
+        length: how many bytes to read. A negative length means till the end of the file.
+        io_mode: is one of:
+            'cached'   -> read it through the page cache as usual.
+            'uncached' -> read it through the page cache, but drop what was read from it right behind the reading.
+            'direct'   -> read it around the page cache (O_DIRECT). Or 'uncached' where it's not supported.
+        block_size: how many bytes are read at once, into the same reused buffer.
+        use_mmap: whether to hash it straight out of its memory map instead, if it's cached and at least MMAP_MIN_SIZE
+                  bytes, and it's being hashed till the end."""
     if hash_type == 'sha1':
         hash_sum = hashlib_sha1()
     elif hash_type == 'sha256':
@@ -82,14 +164,227 @@ def hash_file_contents(filename, hash_type='md5') -> str:
     else:
         hash_sum = hashlib_md5()
 
-    with open(filename, 'rb') as f:
-        for chunk in iter(lambda: f.read(4096), b''):
-            hash_sum.update(chunk)
+    buffer = _read_buffer(size=block_size)
+    if io_mode == 'direct' and _hash_file_directly(filename, hash_sum, offset=offset, length=length, buffer=buffer):
+        return hash_sum.hexdigest()
+
+    with open(filename, 'rb', buffering=0) as f:
+        uncached = io_mode != 'cached'
+        if uncached:
+            _advise(f.fileno(), advice=POSIX_FADV_NOREUSE)
+        if offset > 0:
+            f.seek(offset)
+        elif offset < 0:
+            f.seek(max(f.seek(0, 2) + offset, 0))
+
+        # where the pages that were read start, that are still in the page cache
+        start = f.tell()
+        st = os_fstat(f.fileno())
+
+        # a sparse file (which takes less blocks than its size) is read extent by extent, and its holes are hashed as
+        # the zeros they are, without being read
+        if os_SEEK_DATA is not None and st.st_blocks * 512 < st.st_size:
+            end = st.st_size if length < 0 else min(start + length, st.st_size)
+            for extent_offset, extent_length, is_data in _data_extents(f.fileno(), start=start, end=end):
+                if is_data:
+                    f.seek(extent_offset)
+                    _hash_opened_file(f, hash_sum, buffer=buffer, length=extent_length, uncached=uncached)
+                else:
+                    _hash_zeros(hash_sum, length=extent_length)
+
+        elif use_mmap and not uncached and length < 0 and st.st_size >= MMAP_MIN_SIZE:
+            with mmap(f.fileno(), 0, access=ACCESS_READ) as mapped, memoryview(mapped) as view:
+                hash_sum.update(view[start:])
+
+        else:
+            _hash_opened_file(f, hash_sum, buffer=buffer, length=length, uncached=uncached)
+
+        # including what the kernel has read ahead
+        if uncached:
+            _advise(f.fileno(), offset=start, advice=POSIX_FADV_DONTNEED)
 
     return hash_sum.hexdigest()
     # return hash_sum.digest()
 
 
+def _hash_opened_file(f=None, hash_sum=None, buffer=None, length=-1, uncached=False) -> None:
+    """ Update the given hash_sum with the given length (negative: till the end) of the given opened file, from its
+        current position, by reading it into the given buffer block by block.
+
+        uncached: whether to drop what was read from the page cache, every DROP_BEHIND_SIZE bytes. """
+
+    # where the pages that were read start, that are still in the page cache
+    start = f.tell()
+    with memoryview(buffer) as view:
+        while length:
+            read = f.readinto(view[:len(view) if length < 0 else min(length, len(view))])
+            if not read:
+                break
+            hash_sum.update(view[:read])
+            if length > 0:
+                length -= read
+            if uncached and f.tell() - start >= DROP_BEHIND_SIZE:
+                _advise(f.fileno(), offset=start, length=f.tell() - start, advice=POSIX_FADV_DONTNEED)
+                start = f.tell()
+
+
+def _hash_zeros(hash_sum=None, length=0) -> None:
+    """ Update the given hash_sum with the given number of zeros. (ex: a hole of a sparse file) """
+
+    while length > 0:
+        hash_sum.update(_ZEROS[:min(length, len(_ZEROS))])
+        length -= len(_ZEROS)
+
+
+def _data_extents(fd=-1, start=0, end=0):
+    """ Yield (offset, length, is_data) for each data extent and each hole of the given range of the given open file,
+        in order. Through lseek's SEEK_DATA and SEEK_HOLE, or as a single data extent where they are not supported. """
+
+    pos = start
+    while pos < end:
+        try:
+            data = min(os_lseek(fd, pos, os_SEEK_DATA), end)
+        except OSError as e:
+            if e.errno != ENXIO:  # otherwise, there is no data after pos
+                yield pos, end - pos, True
+                return
+            data = end
+        if data > pos:
+            yield pos, data - pos, False
+        if data >= end:
+            return
+
+        try:
+            hole = min(os_lseek(fd, data, os_SEEK_HOLE), end)
+        except OSError as _:
+            hole = end
+        yield data, hole - data, True
+        pos = hole
+
+
+def _hash_file_directly(filename, hash_sum=None, offset=0, length=-1, buffer=None) -> bool:
+    """ Update the given hash_sum with the given part of the given file, by reading it around the page cache (O_DIRECT)
+        into the given aligned buffer. Return False, without hashing anything, if the file can not be read that way.
+        (ex: on tmpfs, or where O_DIRECT is not supported) """
+
+    if not os_preadv:
+        return False
+    try:
+        fd = os_open(filename, O_RDONLY | O_DIRECT)
+    except OSError as e:
+        if e.errno == EINVAL:
+            return False
+        raise
+
+    try:
+        size = os_fstat(fd).st_size
+        start = offset if offset >= 0 else max(size + offset, 0)
+        end = size if length < 0 else min(start + length, size)
+
+        # O_DIRECT reads have to start at aligned positions, into aligned memory
+        pos = start - start % DIRECT_IO_ALIGNMENT
+        with memoryview(buffer) as view:
+            while pos < end:
+                # only what is left of the given part is read, rounded up to the alignment (ex: 4KiB of a head)
+                wanted = ceil(min(end - pos, len(buffer)) / DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT
+                try:
+                    read = os_preadv(fd, [view[:wanted]], pos)
+                except OSError as e:
+                    if e.errno == EINVAL and pos < start + DIRECT_IO_ALIGNMENT:
+                        return False
+                    raise
+                if read <= 0:
+                    break
+                hash_sum.update(view[max(start - pos, 0):min(end - pos, read)])
+                pos += read
+    finally:
+        os_close(fd)
+
+    return True
+
+
+def _read_buffer(size=HASH_BLOCK_SIZE) -> mmap:
+    """ Return the reading buffer of the calling thread, which is reused as long as the given size stays the same.
+        Its size is rounded up to DIRECT_IO_ALIGNMENT, and it's an anonymous mmap since that's aligned to the memory
+        pages. So it can be read into with O_DIRECT as well. """
+
+    size = max(ceil(size / DIRECT_IO_ALIGNMENT), 1) * DIRECT_IO_ALIGNMENT
+    if len(getattr(_buffers, 'buffer', b'')) != size:
+        _buffers.buffer = mmap(-1, size)
+
+    return _buffers.buffer
+
+
+def prefetch_file(filename='', offset=0, length=0) -> None:
+    """ Ask the kernel to start reading the given part of the given file into the page cache in the background, without
+        waiting for it. It does nothing where it's not supported, or if the file could not be opened.
+
+        offset: where the part starts. A negative offset is counted from the end of the file.
+        length: how many bytes the part has. Zero means till the end of the file. """
+
+    if not os_posix_fadvise:
+        return
+    try:
+        fd = os_open(filename, O_RDONLY)
+    except OSError as _:
+        return
+    try:
+        if offset < 0:
+            offset = max(os_fstat(fd).st_size + offset, 0)
+        _advise(fd, offset=offset, length=length, advice=POSIX_FADV_WILLNEED)
+    except OSError as _:
+        pass
+    finally:
+        os_close(fd)
+
+
+def _advise(fd=-1, offset=0, length=0, advice=None) -> None:
+    """ Give the kernel the given advice (posix_fadvise) about the given part of the given open file, if it can. """
+
+    if os_posix_fadvise:
+        with suppress(OSError):
+            os_posix_fadvise(fd, offset, length, advice)
+
+
+def segment_offsets(size=0, segment_size=0) -> list:
+    """ Return where each segment of a file of the given size starts, if it's big enough to be hashed segment by
+        segment. (at least SEGMENTED_HASH_MIN_SEGMENTS segments) Otherwise, an empty list. """
+
+    if segment_size <= 0 or size < segment_size * SEGMENTED_HASH_MIN_SEGMENTS:
+        return []
+    return list(range(0, size, segment_size))
+
+
+def hash_digests(digests=None, hash_type='md5') -> str:
+    """ Return the hash of the given (hex) digests, in the given order. Which is the digest of a file that was hashed
+        segment by segment. Or an empty string if any of them is missing. (ex: a segment could not be read) """
+
+    if not digests or not all(digests):
+        return ''
+
+    hash_funcs = {'sha1': hashlib_sha1, 'sha256': hashlib_sha256, 'sha512': hashlib_sha512}
+    return hash_funcs.get(hash_type, hashlib_md5)(b''.join(bytes.fromhex(digest) for digest in digests)).hexdigest()
+
+
+def digest_size(hash_type='md5') -> int:
+    """ Return how many bytes a (binary) digest of the given hash type has. """
+
+    hash_funcs = {'sha1': hashlib_sha1, 'sha256': hashlib_sha256, 'sha512': hashlib_sha512}
+    return hash_funcs.get(hash_type, hashlib_md5)().digest_size
+
+
+def hash_speed(hash_type='md5', sample_size=8 * 1024 * 1024) -> float:
+    """ Return how many bytes per second a single core can hash, using the given hash type. """
+
+    sample = bytes(sample_size)
+    start = perf_counter()
+    hash_funcs = {'sha1': hashlib_sha1, 'sha256': hashlib_sha256, 'sha512': hashlib_sha512}
+    hash_funcs.get(hash_type, hashlib_md5)(sample).digest()
+    elapsed = perf_counter() - start
+
+    return sample_size / elapsed if elapsed > 0 else float('inf')
+
+
 def hash_string(string='', hash_type='md5'):
     """Returns the md5, sha1, sha256 or sha512 hash of the given string"""
     if hash_type == 'sha1':
@@ -104,6 +399,75 @@ def hash_string(string='', hash_type='md5'):
     return ret
 
 
+def split_identical_files(files=None, block_size=COMPARE_BLOCK_SIZE, io_mode='cached',
+                          max_open=COMPARE_MAX_OPEN_FILES, unreadable=None) -> list:
+    """ Return the groups of the given files that have identical contents, by reading them block by block in lockstep.
+        A group stops being read as soon as its files differ. Files that are identical to no other are not returned.
+
+        io_mode: unless it's 'cached', what was read of each file is dropped from the page cache once it's closed.
+        max_open: how many files are kept open at once. The least recently read one is closed to open another, and
+            re-opened at the position it was at whenever it's read again.
+        unreadable: a list to append the files that could not be opened or read to. Which are left out of the groups,
+            instead of failing all of them.
+
+        Ex: [[filepath1, filepath3], [filepath2, filepath4, filepath5], ..]"""
+
+    def _close(handler=None) -> None:
+        if handler is None:
+            return
+        if io_mode != 'cached':
+            _advise(handler.fileno(), advice=POSIX_FADV_DONTNEED)
+        handler.close()
+
+    def _read(file=None, offset=0) -> bytes or None:
+        # the handlers are kept in the order they were last read, so the first one is the least recently read
+        handler = handlers.pop(file, None)
+        try:
+            if handler is None:
+                while handlers and len(handlers) >= max(1, max_open):
+                    _close(handlers.pop(next(iter(handlers))))
+                handler = open(file, 'rb')
+                handler.seek(offset)
+            block = handler.read(block_size)
+        except OSError as _:
+            _close(handler)
+            if unreadable is not None:
+                unreadable.append(file)
+            return None
+        handlers[file] = handler
+        return block
+
+    ret = []
+    # {filepath: handler, ..}
+    handlers = {}
+    try:
+        # [(offset, [filepath1, filepath2, .., filepathN]), ..]
+        groups = [(0, list(files))]
+        while groups:
+            offset, group = groups.pop()
+            # {block: [filepath1, filepath2, .., filepathN], ..}
+            blocks = {}
+            for file in group:
+                block = _read(file, offset)
+                if block is not None:
+                    blocks.setdefault(block, []).append(file)
+
+            for block, same_block in blocks.items():
+                if len(same_block) < 2:
+                    _close(handlers.pop(same_block[0], None))
+                elif not block:
+                    ret.append(same_block)
+                    for file in same_block:
+                        _close(handlers.pop(file, None))
+                else:
+                    groups.append((offset + len(block), same_block))
+    finally:
+        for handler in handlers.values():
+            _close(handler)
+
+    return ret
+
+
 # ------------------------------
 #      FILES & DIRECTORIES
 # ------------------------------
@@ -320,8 +684,14 @@ def remove_empty_dirs(path=None, remove_base_dir=False, verbose=False, re_print=
 
 
 def get_dir_size(dir_path=None, follow_links=False, which=None, show_progress=False,
-                 verbose=False, re_print=True) -> int:
-    """ Calculate and return the total files size in a given directory's path. """
+                 verbose=False, re_print=True, jobs=1) -> int:
+    """ Calculate and return the total files size in a given directory's path.
+
+        jobs: how many directories to list at once. (see: walk_files()) """
+
+    def _skip(error=OSError()) -> None:
+        log(msg='Skipping directory: "%s" because it is not readable!' % error.filename,
+            verbose=verbose, re_print=re_print, lvl=1)
 
     total_size = 0
     if path_is(paths=dir_path, checks='edr', verbose=verbose, re_print=re_print):
@@ -331,23 +701,18 @@ def get_dir_size(dir_path=None, follow_links=False, which=None, show_progress=Fa
             else:
                 which = ''
 
-            for path, _, files in os_walk(dir_path, followlinks=follow_links):
-                rpf(msg='Calculating %sSize' % which, status='%s' % waiting_indicator(),
-                    suffix=' \r', max_cols=MAX_LINE_COLUMNS)
-                if path_is(paths=path, checks='er', verbose=verbose, re_print=re_print):
-                    for f in files:
-                        fp = os_path.join(path, f)
-                        if not os_path.islink(fp):
-                            total_size += os_path.getsize(fp)
-                else:
-                    log(msg='Skipping directory: "%s" because it is not readable!' % path,
-                        verbose=verbose, re_print=re_print, lvl=1)
+            for i, (_, st) in enumerate(walk_files(path=dir_path, follow_links=follow_links, jobs=jobs,
+                                                   onerror=_skip)):
+                if not i % 1000:
+                    rpf(msg='Calculating %sSize' % which, status='%s' % waiting_indicator(),
+                        suffix=' \r', max_cols=MAX_LINE_COLUMNS)
+                if st is not None and not S_ISLNK(st.st_mode):
+                    total_size += st.st_size
             pf('Calculating %sSize' % which, status='Done', suffix=' \r', suffix_space=True, max_cols=MAX_LINE_COLUMNS)
         else:
-            total_size = sum((os_path.getsize(os_path.join(path, f)) for path, _, files in
-                              os_walk(dir_path, followlinks=follow_links)
-                              if path_is(paths=path, checks='er', verbose=verbose, re_print=re_print) for f in files
-                              if not os_path.islink(os_path.join(path, f))))
+            total_size = sum(st.st_size for _, st in walk_files(path=dir_path, follow_links=follow_links, jobs=jobs,
+                                                                onerror=_skip)
+                             if st is not None and not S_ISLNK(st.st_mode))
 
     return total_size
 
@@ -396,8 +761,13 @@ def count_files(path=None, which=None, follow_links=False, show_progress=False,
     return total_files
 
 
-def find_files_recursively(path=None, which=None, follow_links=False, show_progress=False, verbose=False) -> list:
-    """ Return a list of files that have been found recursively in a given path. """
+def find_files_recursively(path=None, which=None, follow_links=False, show_progress=False, verbose=False,
+                           with_stats=False, jobs=1) -> list:
+    """ Return a list of files that have been found recursively in a given path.
+
+        with_stats: return a list of (file, os.stat_result) instead, where os.stat_result is the file's lstat
+                    as it was found while walking. (see: walk_files())
+        jobs: how many directories to list at once. (see: walk_files()) """
 
     files = []
     if not path_is(paths=path, checks='ed', verbose=verbose, log_lvl=3):
@@ -405,18 +775,119 @@ def find_files_recursively(path=None, which=None, follow_links=False, show_progr
     elif show_progress:
         msg = 'Finding %s Files' % which.upper() if which and which.upper() in ('SRC', 'DST') else 'Finding Files'
 
-        for _path, _, filenames in os_walk(path, followlinks=follow_links):
-            files += [os_path.join(_path, f) for f in iter(filenames)]
-            rpf(msg=msg, status=' %s' % waiting_indicator(), suffix=' \r', max_cols=MAX_LINE_COLUMNS)
+        for i, (file, st) in enumerate(walk_files(path=path, follow_links=follow_links, jobs=jobs)):
+            files.append((file, st) if with_stats else file)
+            if not i % 1000:
+                rpf(msg=msg, status=' %s' % waiting_indicator(), suffix=' \r', max_cols=MAX_LINE_COLUMNS)
 
         pf(msg=msg, status='Done', suffix=' \r', max_cols=MAX_LINE_COLUMNS)
 
     else:
         # same as the following, (will count links AND sockets). but won't be able to show the progress until it's done
-        files = [os_path.join(_p, f) for _p, _, ff in os_walk(path, followlinks=follow_links) for f in iter(ff)]
+        files = [(file, st) if with_stats else file
+                 for file, st in walk_files(path=path, follow_links=follow_links, jobs=jobs)]
 
     return files
 
+
+def walk_files(path=None, follow_links=False, jobs=1, onerror=None):
+    """ Yield (file, os.stat_result) for each file that is found recursively in a given path, in the same order as
+        os.walk() would. But through os.scandir(), so the lstat of each file comes along with it. (os.stat_result is
+        None if the file could not be stat'ed, ex: it's been removed meanwhile)
+
+        Like os.walk(), the links to directories are neither yielded, nor followed unless follow_links. And when they
+        are followed, each directory is only walked once. (to avoid the infinite links loops)
+
+        jobs: how many directories to list at once through threads. Which pays off on network mounts, where listing
+              each directory waits on a round trip. The files are yielded in the same order either way.
+        onerror: (like os.walk()'s) a function that is called with the OSError of each directory that can't be listed.
+    """
+
+    def _list_dir(top='', ancestors=frozenset()) -> (tuple, list, list):
+        """ Return the (device, inode) of the given directory (if following the links), its (file, os.stat_result)s,
+            and the (sub_dir, ancestors) of its sub-directories. """
+
+        key = None
+        if follow_links:
+            try:
+                st = os_stat(top)
+            except OSError as e:
+                return _failed(e)
+            key = (st.st_dev, st.st_ino)
+            # a link to one of its own parent directories
+            if key in ancestors:
+                return key, [], []
+            ancestors = ancestors | {key}
+
+        try:
+            with os_scandir(top) as entries:
+                entries = list(entries)
+        except OSError as e:
+            return _failed(e)
+
+        files = []
+        sub_dirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError as _:
+                is_dir = False
+
+            if is_dir:
+                if follow_links or not entry.is_symlink():
+                    sub_dirs.append((entry.path, ancestors))
+                continue
+
+            try:
+                files.append((entry.path, entry.stat(follow_symlinks=False)))
+            except OSError as _:
+                files.append((entry.path, None))
+
+        return key, files, sub_dirs
+
+    def _failed(error=OSError()) -> (tuple, list, list):
+        if onerror is not None:
+            onerror(error)
+        return None, [], []
+
+    def _walk(pool=None, window=0):
+        # the (device, inode) of the walked directories
+        walked = set()
+        # [[directory, ancestors, Future or None], ..] where the last one is the next to be walked
+        dirs = [[path, frozenset(), None]]
+        pending = 0
+        while dirs:
+            # the next directories to be walked are being listed ahead, but no more than the given window of them at
+            # once. (a directory that is linked more than once might be listed more than once, but it's only walked
+            # once)
+            if pool is not None:
+                for item in reversed(dirs[-window:]):
+                    if pending >= window:
+                        break
+                    if item[2] is None:
+                        item[2] = pool.submit(_list_dir, item[0], item[1])
+                        pending += 1
+
+            top, ancestors, future = dirs.pop()
+            if future is not None:
+                pending -= 1
+                key, files, sub_dirs = future.result()
+            else:
+                key, files, sub_dirs = _list_dir(top, ancestors)
+
+            if key is not None:
+                if key in walked:
+                    continue
+                walked.add(key)
+            yield from files
+            dirs += [[sub_dir, sub_ancestors, None] for sub_dir, sub_ancestors in reversed(sub_dirs)]
+
+    if jobs > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from _walk(pool=pool, window=jobs * MAX_PENDING_JOBS_PER_WORKER)
+    else:
+        yield from _walk()
+
 # ----------------------------------------------------------------------
 
 
@@ -592,6 +1063,39 @@ def remove_file(file='', verbose=False, re_print=True) -> bool:
         return False
 
 
+# ------------------------------
+#         DISK  LAYOUT
+# ------------------------------
+
+
+# Linux's FS_IOC_FIEMAP, which maps the extents of a file. The request is a "struct fiemap" header (start, length,
+# flags, mapped_extents, extent_count, reserved), followed by "struct fiemap_extent"s (logical, physical, length,
+# reserved64[2], flags, reserved[3]).
+_FS_IOC_FIEMAP = 0xC020660B
+_FIEMAP_HEADER = '=QQLLLL'
+_FIEMAP_EXTENT = '=QQQQQLLLL'
+
+
+def physical_offset(filename='') -> int:
+    """ Return where the first extent of the given file physically starts on its disk (through Linux's FIEMAP),
+        or 0 if it's unknown. (ex: the file is empty, or the platform or file-system does not support it) """
+
+    if fcntl_ioctl is None:
+        return 0
+
+    request = bytearray(struct_pack(_FIEMAP_HEADER, 0, 0xFFFFFFFFFFFFFFFF, 0, 0, 1, 0))
+    request += bytes(struct_calcsize(_FIEMAP_EXTENT))
+    try:
+        with open(filename, 'rb') as f:
+            fcntl_ioctl(f.fileno(), _FS_IOC_FIEMAP, request)
+    except OSError as _:
+        return 0
+
+    if not struct_unpack_from(_FIEMAP_HEADER, request)[3]:  # fm_mapped_extents
+        return 0
+    return struct_unpack_from(_FIEMAP_EXTENT, request, struct_calcsize(_FIEMAP_HEADER))[1]  # fe_physical
+
+
 # ------------------------------
 #        MULTIPROCESSING
 #               &
@@ -600,9 +1104,61 @@ def remove_file(file='', verbose=False, re_print=True) -> bool:
 
 
 def has_multiple_cores() -> bool:
-    """ Return True if the system has multiple cores, otherwise False."""
+    """ Return True if DuGu can use multiple cores, otherwise False."""
+
+    return available_cpus() > 1
+
+
+def available_cpus() -> int:
+    """ Return how many CPUs DuGu can actually use. Which respects its CPU affinity, and the CPU quota of its cgroup.
+        (Unlike cpu_count(), which returns all the CPUs of the machine, even inside a container) """
+
+    cpus = cpu_count()
+    if os_sched_getaffinity is not None:
+        with suppress(OSError):
+            cpus = len(os_sched_getaffinity(0))
+
+    quota = cgroup_cpu_quota()
+    if quota > 0:
+        cpus = min(cpus, max(1, ceil(quota)))
+
+    return max(1, cpus)
+
+
+def cgroup_cpu_quota() -> float:
+    """ Return how many CPUs worth of time the cgroup of DuGu is allowed to use, or 0 if it's not limited. """
+
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    for cpu_max in (_cgroup_path('', 'cpu.max'), '/sys/fs/cgroup/cpu.max'):
+        with suppress(OSError, ValueError, IndexError):
+            with open(cpu_max) as f:
+                quota, period = f.read().split()[:2]
+            return 0 if quota == 'max' else int(quota) / int(period)
+
+    # cgroup v1: quota is -1 when it's not limited
+    for cpu_dir in (_cgroup_path('cpu', ''), '/sys/fs/cgroup/cpu', '/sys/fs/cgroup/cpu,cpuacct'):
+        with suppress(OSError, ValueError):
+            with open(os_path.join(cpu_dir, 'cpu.cfs_quota_us')) as f:
+                quota = int(f.read())
+            with open(os_path.join(cpu_dir, 'cpu.cfs_period_us')) as f:
+                period = int(f.read())
+            return quota / period if quota > 0 and period > 0 else 0
+
+    return 0
+
+
+def _cgroup_path(controller='', filename='') -> str:
+    """ Return the path of the given file, in the cgroup of the given controller ('' for cgroup v2) of DuGu.
+        Or an empty string if it couldn't be found. """
 
-    return cpu_count() > 1
+    with suppress(OSError):
+        with open('/proc/self/cgroup') as f:
+            for line in f:
+                _, controllers, path = line.rstrip('\n').split(':', 2)
+                if (not controller and not controllers) or controller in controllers.split(','):
+                    base = '/sys/fs/cgroup' if not controller else os_path.join('/sys/fs/cgroup', controllers)
+                    return os_path.join(base, path.lstrip('/'), filename)
+    return ''
 
 
 # ------------------------------
@@ -16,16 +16,19 @@
 
 # Standard library imports
 from __future__ import absolute_import
-from stat import S_ISSOCK
-from time import (
-    strftime as time_strftime,
-    localtime as time_localtime
+from errno import ELOOP
+from stat import (
+    S_ISSOCK,
+    S_ISLNK,
+    S_ISREG,
+    S_ISDIR,
 )
 from os import (
     path as os_path,
     access as os_access,
     R_OK,
-    stat as os_stat
+    stat as os_stat,
+    lstat as os_lstat,
 )
 
 # Third party imports
@@ -36,9 +39,16 @@ from dugu.data import (
 )
 from dugu.utils import (
     hash_file_contents,
+    hash_digests,
+    segment_offsets,
+    split_identical_files,
+    physical_offset,
+    prefetch_file,
 )
 from dugu.constants import (
-    DATETIME_FORMAT
+    PARTIAL_HASH_SIZE,
+    PREFETCH_MAX_BYTES,
+    HASH_BLOCK_SIZE,
 )
 
 
@@ -47,55 +57,209 @@ from dugu.constants import (
 
 class DuGuWorker:
 
+    # The settings of the batch jobs. (see: DuGuWorker.init_settings())
+    _settings = {}
+
     # ------------------------------
     #            JOBS
     # ------------------------------
 
     @staticmethod
-    def scrub_file(file_path=None, args=None) -> DuGuFileInfo:
-        """ Extracts file_path, size, modified_datetime and hash of a given file """
+    def inspect_file(file_path=None, args=None, st=None) -> DuGuFileInfo:
+        """ Extracts file_path, size and modified time of a given file, without hashing it. Out of a single lstat,
+            and a single stat of its target if it's a link to be followed.
+
+            st: the os.stat_result of the file's lstat, if it's already known. (ex: from walking) """
 
         ret = DuGuFileInfo()
         if not file_path:
             return ret
         ff = os_path.abspath(file_path)
 
-        if os_path.islink(ff):
+        if st is None:
+            try:
+                st = os_lstat(ff)
+            except OSError as _:
+                ret.add_log('Ignoring Inexistent: %s' % ff)
+                return ret
+
+        if S_ISLNK(st.st_mode):
             if not args.symlinks:
                 ret.add_log('Ignoring Link: %s' % ff)
                 return ret
             # otherwise, read the link
-            anti_link_loop = []
-            while os_path.islink(ff):
-                anti_link_loop.append(ff)
-                ff = os_path.realpath(ff)
-                if ff in anti_link_loop:
+            ff = os_path.realpath(ff)
+            try:
+                st = os_stat(ff)
+            except OSError as e:
+                if e.errno == ELOOP:
                     ret.add_log('Ignoring Infinite link loop: %s' % ff)
-                    return ret
-                if os_path.isdir(ff):
-                    return ret
-
-        if not os_path.exists(ff):
-            ret.add_log('Ignoring Inexistent: %s' % ff)
+                else:
+                    ret.add_log('Ignoring Inexistent: %s' % ff)
+                return ret
+            if S_ISDIR(st.st_mode):
+                return ret
 
-        elif not os_access(ff, R_OK):
+        if not os_access(ff, R_OK):
             ret.add_log('Ignoring Unreadable: %s' % ff)
 
-        elif S_ISSOCK(os_stat(ff).st_mode):
+        elif S_ISSOCK(st.st_mode):
             ret.add_log('Ignoring Socket: %s' % ff)
 
-        elif os_path.isfile(ff):
-            dt_modified = time_strftime(DATETIME_FORMAT, time_localtime(os_path.getmtime(ff)))
-            size = os_path.getsize(ff)
-            hash_sig = hash_file_contents(ff, args.hashtype)
-            ret.set_info(f_name=ff, f_size=size, f_date=dt_modified, f_hash=hash_sig)
-            # self.scan_result['files'][ff] = [size, dt_modified, hash_sig]
+        elif S_ISREG(st.st_mode):
+            offset = physical_offset(ff) if getattr(args, 'read_order', '') == 'physical' else 0
+            ret.set_info(f_name=ff, f_size=st.st_size, f_mtime=st.st_mtime_ns, f_device=st.st_dev,
+                         f_inode=st.st_ino, f_offset=offset)
 
         else:
             ret.add_log('Unknown: %s' % ff)
 
         return ret
 
+    @staticmethod
+    def hash_file(file_path=None, hash_type='md5', stage='full', io_mode='cached', block_size=HASH_BLOCK_SIZE,
+                  use_mmap=False, segment_size=0) -> str:
+        """ Return the hash of a given (already inspected) file, or an empty string if it could not be read.
+
+            stage: is one of:
+                'head' -> hash only the first PARTIAL_HASH_SIZE bytes.
+                'tail' -> hash only the last PARTIAL_HASH_SIZE bytes.
+                'full' -> hash the whole contents. Or segment by segment, if it's big enough. (see: segment_offsets())
+            io_mode, block_size & use_mmap: how the file is read. (see: hash_file_contents())
+            segment_size: how many bytes each segment has. (0 to always hash the whole contents at once) """
+
+        reading = {'io_mode': io_mode, 'block_size': block_size, 'use_mmap': use_mmap}
+        try:
+            if stage == 'head':
+                return hash_file_contents(file_path, hash_type, offset=0, length=PARTIAL_HASH_SIZE, **reading)
+            elif stage == 'tail':
+                return hash_file_contents(file_path, hash_type, offset=-PARTIAL_HASH_SIZE, length=PARTIAL_HASH_SIZE,
+                                          **reading)
+            offsets = segment_offsets(size=os_path.getsize(file_path), segment_size=segment_size)
+            if offsets:
+                return hash_digests([hash_file_contents(file_path, hash_type, offset=offset, length=segment_size,
+                                                        **reading) for offset in offsets], hash_type)
+            return hash_file_contents(file_path, hash_type, **reading)
+        except OSError as _:
+            return ''
+
+    @staticmethod
+    def prefetch_file(file_path=None, stage='full') -> None:
+        """ Ask the kernel to start reading what the given stage needs of the given file in the background. """
+
+        if stage == 'head':
+            prefetch_file(file_path, offset=0, length=PARTIAL_HASH_SIZE)
+        elif stage == 'tail':
+            prefetch_file(file_path, offset=-PARTIAL_HASH_SIZE, length=PARTIAL_HASH_SIZE)
+        else:
+            prefetch_file(file_path, offset=0, length=PREFETCH_MAX_BYTES)
+
+    @staticmethod
+    def compare_files(files=None) -> tuple:
+        """ Return the groups of the given (already inspected) files that have identical contents, along with the
+            files that could not be read (which are left out of the groups), as ([[file1, file2], ..], [file3, ..]) """
+
+        unreadable = []
+        identical_sets = split_identical_files(files, io_mode=DuGuWorker._settings.get('io_mode', 'cached'),
+                                               unreadable=unreadable)
+        return identical_sets, unreadable
+
+    # ------------------------------
+    #          BATCH JOBS
+    # ------------------------------
+
+    @staticmethod
+    def inspect_files(files=None, args=None, stats=None) -> list:
+        """ Return the inspected DuGuFileInfo of each of the given files, in the same order.
+
+            stats: the already known lstat of each of the given files, in the same order. (None for the unknown) """
+
+        stats = stats or [None] * len(files)
+        return [DuGuWorker.inspect_file(file_path=file, args=args, st=st) for file, st in zip(files, stats)]
+
+    @staticmethod
+    def stat_files(files=None) -> list:
+        """ Return the (size, mtime) of each of the given files, in the same order. Where mtime is in nanoseconds.
+            None is returned for each file that does not exist, or is not a regular file. (links are followed) """
+
+        ret = []
+        for file in files:
+            try:
+                st = os_stat(file)
+            except OSError as _:
+                ret.append(None)
+                continue
+            ret.append((st.st_size, st.st_mtime_ns) if S_ISREG(st.st_mode) else None)
+
+        return ret
+
+    @staticmethod
+    def hash_files(files=None, stage='full', upcoming=None) -> list:
+        """ Return the hashes of the given (already inspected) files, in the same order.
+            An empty string is returned for each file that could not be read.
+
+            While hashing each file, the next few ones are being read ahead in the background. (see: --prefetch)
+            upcoming: the files that are going to be hashed right after these ones, to be read ahead as well. """
+
+        hash_type = DuGuWorker._settings.get('hash_type', 'md5')
+        prefetch = DuGuWorker._settings.get('prefetch', 0)
+        reading = {'io_mode': DuGuWorker._settings.get('io_mode', 'cached'),
+                   'block_size': DuGuWorker._settings.get('block_size', HASH_BLOCK_SIZE),
+                   'use_mmap': DuGuWorker._settings.get('use_mmap', False),
+                   'segment_size': DuGuWorker._settings.get('segment_size', 0)}
+
+        ret = []
+        ahead = list(files) + list(upcoming or [])
+        for k, file in enumerate(files):
+            # first, the next `prefetch` files. Then one more with each file, to stay `prefetch` files ahead
+            if prefetch:
+                for next_file in ahead[k + 1 if k == 0 else k + prefetch:k + prefetch + 1]:
+                    DuGuWorker.prefetch_file(file_path=next_file, stage=stage)
+            ret.append(DuGuWorker.hash_file(file_path=file, hash_type=hash_type, stage=stage, **reading))
+
+        return ret
+
+    @staticmethod
+    def hash_segments(segments=None) -> list:
+        """ Return the hashes of the given [(file, offset), ..] segments of the (already inspected) files, in the same
+            order. An empty string is returned for each segment that could not be read. (see: segment_offsets()) """
+
+        hash_type = DuGuWorker._settings.get('hash_type', 'md5')
+        segment_size = DuGuWorker._settings.get('segment_size', 0)
+        reading = {'io_mode': DuGuWorker._settings.get('io_mode', 'cached'),
+                   'block_size': DuGuWorker._settings.get('block_size', HASH_BLOCK_SIZE)}
+
+        ret = []
+        for file, offset in segments:
+            try:
+                ret.append(hash_file_contents(file, hash_type, offset=offset, length=segment_size, **reading))
+            except OSError as _:
+                ret.append('')
+
+        return ret
+
+    # ------------------------------
+    #           SETTINGS
+    # ------------------------------
+
+    @staticmethod
+    def settings(args=None) -> dict:
+        """ Return the settings that the batch jobs need out of the given argparse.Namespace. """
+
+        # reading ahead around the page cache would only fill it up
+        prefetch = max(args.prefetch, 0) if args.io_mode != 'direct' else 0
+
+        return {'hash_type': args.hashtype, 'prefetch': prefetch, 'io_mode': args.io_mode,
+                'block_size': max(args.block_size, 1) * 1024, 'use_mmap': args.mmap,
+                'segment_size': max(args.segment_size, 0) * 1024 * 1024}
+
+    @staticmethod
+    def init_settings(settings=None) -> None:
+        """ Store the given settings, to be used by all batch jobs. It's meant to be the pools' initializer, so the
+            settings are sent only once to each worker, instead of being sent with every job. """
+
+        DuGuWorker._settings = dict(settings or {})
+
 
 # ----------------------------------------------------------------------
 